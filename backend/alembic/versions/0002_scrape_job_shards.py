@@ -0,0 +1,31 @@
+"""scrape job shards
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-10-20 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Batch mode so SQLite, which can't add a foreign key with ALTER TABLE, recreates the table instead.
+    with op.batch_alter_table("scrape_jobs") as batch_op:
+        batch_op.add_column(sa.Column("parent_id", sa.Integer))
+        batch_op.add_column(sa.Column("domain", sa.String(length=255)))
+        batch_op.create_foreign_key("fk_scrape_jobs_parent_id", "scrape_jobs", ["parent_id"], ["id"])
+        batch_op.create_index("ix_scrape_jobs_parent_id", ["parent_id"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("scrape_jobs") as batch_op:
+        batch_op.drop_index("ix_scrape_jobs_parent_id")
+        batch_op.drop_constraint("fk_scrape_jobs_parent_id", type_="foreignkey")
+        batch_op.drop_column("domain")
+        batch_op.drop_column("parent_id")
@@ -0,0 +1,22 @@
+"""scrape job metrics
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-10-22 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("scrape_jobs", sa.Column("metrics", sa.JSON))
+
+
+def downgrade() -> None:
+    op.drop_column("scrape_jobs", "metrics")
@@ -0,0 +1,28 @@
+"""listing recrawl schedule
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-10-24 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("listings", sa.Column("visit_count", sa.Integer, nullable=False, server_default="0"))
+    op.add_column("listings", sa.Column("change_count", sa.Integer, nullable=False, server_default="0"))
+    op.add_column("listings", sa.Column("next_visit_at", sa.DateTime))
+    op.create_index("ix_listings_next_visit_at", "listings", ["next_visit_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_listings_next_visit_at", table_name="listings")
+    op.drop_column("listings", "next_visit_at")
+    op.drop_column("listings", "change_count")
+    op.drop_column("listings", "visit_count")
@@ -0,0 +1,43 @@
+"""listing identity and source provenance
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-10-31 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("listings", sa.Column("vehicle_key", sa.String(96)))
+    op.create_index("ix_listings_vehicle_key", "listings", ["vehicle_key"])
+    op.create_table(
+        "listing_sources",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("url_hash", sa.String(64), nullable=False),
+        sa.Column("url", sa.Text, nullable=False),
+        sa.Column("source", sa.String(32), nullable=False),
+        sa.Column("listing_id", sa.String(64), nullable=False),
+        sa.Column("source_listing_id", sa.String(64), nullable=False),
+        sa.Column("vehicle_key", sa.String(96)),
+        sa.Column("first_seen", sa.DateTime, nullable=False),
+        sa.Column("last_seen", sa.DateTime, nullable=False),
+    )
+    op.create_index("ix_listing_sources_url_hash", "listing_sources", ["url_hash"], unique=True)
+    op.create_index("ix_listing_sources_listing_id", "listing_sources", ["listing_id"])
+    op.create_index("ix_listing_sources_vehicle_key", "listing_sources", ["vehicle_key"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_listing_sources_vehicle_key", table_name="listing_sources")
+    op.drop_index("ix_listing_sources_listing_id", table_name="listing_sources")
+    op.drop_index("ix_listing_sources_url_hash", table_name="listing_sources")
+    op.drop_table("listing_sources")
+    op.drop_index("ix_listings_vehicle_key", table_name="listings")
+    op.drop_column("listings", "vehicle_key")
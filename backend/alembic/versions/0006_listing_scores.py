@@ -0,0 +1,28 @@
+"""stored listing scores
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-11-04 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("listings", sa.Column("score", sa.Float))
+    op.add_column("listings", sa.Column("discount_percent", sa.Float))
+    op.add_column("listings", sa.Column("value_components", sa.JSON))
+    op.add_column("listings", sa.Column("scoring_version", sa.Integer))
+
+
+def downgrade() -> None:
+    op.drop_column("listings", "scoring_version")
+    op.drop_column("listings", "value_components")
+    op.drop_column("listings", "discount_percent")
+    op.drop_column("listings", "score")
@@ -0,0 +1,40 @@
+"""listing keyset pagination indexes
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-11-06 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+ACTIVE = "listing_status = 'active'"
+SCORED = f"{ACTIVE} AND score IS NOT NULL"
+INDEXES = {
+    "ix_listings_active_score": (["score DESC", "id DESC"], SCORED),
+    "ix_listings_active_discount": (["discount_percent DESC", "id DESC"], f"{ACTIVE} AND discount_percent IS NOT NULL"),
+    "ix_listings_active_recent": (["date_last_seen DESC", "id DESC"], ACTIVE),
+    "ix_listings_active_state_score": (["dealer_state", "score DESC", "id DESC"], SCORED),
+    "ix_listings_active_trim_msrp": (["trim", "msrp"], ACTIVE),
+}
+
+
+def upgrade() -> None:
+    for name, (columns, where) in INDEXES.items():
+        op.create_index(
+            name,
+            "listings",
+            [sa.text(column) for column in columns],
+            postgresql_where=sa.text(where),
+            sqlite_where=sa.text(where),
+        )
+
+
+def downgrade() -> None:
+    for name in reversed(INDEXES):
+        op.drop_index(name, table_name="listings")
@@ -0,0 +1,32 @@
+"""comparable-cohort discount statistics
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-11-12 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cohort_stats",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("trim", sa.String(32), nullable=False),
+        sa.Column("msrp_bucket", sa.Integer, nullable=False),
+        sa.Column("listing_count", sa.Integer, nullable=False),
+        sa.Column("discounts", sa.JSON, nullable=False),
+        sa.Column("updated_at", sa.DateTime, nullable=False),
+    )
+    op.create_index("ix_cohort_stats_trim_bucket", "cohort_stats", ["trim", "msrp_bucket"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cohort_stats_trim_bucket", table_name="cohort_stats")
+    op.drop_table("cohort_stats")
@@ -0,0 +1,76 @@
+import hashlib
+from collections.abc import Awaitable, Callable
+from fastapi import Request, Response
+from loguru import logger
+from pydantic import BaseModel
+from redis import Redis as SyncRedis, RedisError
+from redis.asyncio import Redis
+from .config import settings
+
+# Source of truth for the generation key. The worker can't import the backend, so worker/main.py
+# repeats it as LISTINGS_GENERATION_KEY and INCRs it after each sweep or replay writes listings.
+GENERATION_KEY = "listings:generation"
+
+redis_conn = Redis.from_url(settings.redis_url)
+
+
+def invalidate() -> None:
+    """Move to a new generation so every cached listing response is rebuilt on next request."""
+    try:
+        SyncRedis.from_url(settings.redis_url).incr(GENERATION_KEY)
+    except RedisError as exc:
+        logger.warning("Failed to invalidate cached responses: {}", exc)
+
+
+def request_key(request: Request, **overrides: str) -> str:
+    params = [(key, value) for key, value in request.query_params.multi_items() if key not in overrides]
+    query = "&".join(f"{key}={value}" for key, value in sorted([*params, *overrides.items()]))
+    return f"{request.url.path}?{query}"
+
+
+def _etag(generation: int, body: bytes) -> str:
+    return f'"{generation}-{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    return etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+
+
+async def cached_response(
+    request: Request, build: Callable[[], Awaitable[BaseModel]], key: str | None = None
+) -> Response:
+    """Serve build()'s JSON from Redis until the listing generation moves on, with ETag revalidation.
+
+    Responses are keyed by path and sorted query string unless the caller passes a canonical key.
+    """
+    try:
+        generation = int(await redis_conn.get(GENERATION_KEY) or 0)
+        key = f"response:{generation}:{key or request_key(request)}"
+        etag, body = await redis_conn.hmget(key, ["etag", "body"])
+    except RedisError as exc:
+        logger.warning("Response cache unavailable: {}", exc)
+        body = (await build()).model_dump_json().encode()
+        return _respond(request, _etag(0, body), body)
+
+    if etag and _not_modified(request, etag.decode()):
+        return Response(status_code=304, headers={"ETag": etag.decode(), "Cache-Control": "no-cache"})
+    if body is None:
+        body = (await build()).model_dump_json().encode()
+        etag = _etag(generation, body).encode()
+        try:
+            await (
+                redis_conn.pipeline()
+                .hset(key, mapping={"etag": etag, "body": body})
+                .expire(key, settings.response_cache_ttl_s)
+                .execute()
+            )
+        except RedisError as exc:
+            logger.warning("Response cache write failed for {}: {}", key, exc)
+    return _respond(request, etag.decode(), body)
+
+
+def _respond(request: Request, etag: str, body: bytes) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,73 @@
+import argparse
+from bisect import bisect_right
+from datetime import datetime
+from itertools import groupby
+from loguru import logger
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from . import cache
+from .db import SessionLocal
+from .models import CohortStats, Listing
+
+# The worker keeps cohort_stats current as it writes (worker/cohorts.py); this module reads it and rebuilds it.
+MSRP_BUCKET = 10000
+
+
+def msrp_bucket(msrp: float | None) -> int | None:
+    return int(msrp // MSRP_BUCKET) if msrp else None
+
+
+def msrp_range(bucket: int) -> tuple[float, float]:
+    return bucket * MSRP_BUCKET, (bucket + 1) * MSRP_BUCKET
+
+
+def median(discounts: list[float]) -> float:
+    return discounts[len(discounts) // 2] if discounts else 0
+
+
+def percentile(discounts: list[float], discount: float) -> float:
+    """Share of the cohort at or below discount, in percent."""
+    return bisect_right(discounts, discount) / len(discounts) * 100 if discounts else 0
+
+
+def rebuild_cohorts(db: Session) -> int:
+    """Recompute every cohort from active listings, e.g. after a rescore changed discounts."""
+    rows = db.execute(
+        select(Listing.trim, Listing.msrp, Listing.discount_percent)
+        .where(
+            Listing.listing_status == "active",
+            Listing.trim.is_not(None),
+            Listing.msrp > 0,
+            Listing.discount_percent.is_not(None),
+        )
+        .order_by(Listing.trim, Listing.msrp)
+    )
+    now = datetime.utcnow()
+    cohorts = []
+    for (trim, bucket), members in groupby(rows, key=lambda row: (row.trim, msrp_bucket(row.msrp))):
+        discounts = sorted(row.discount_percent for row in members)
+        cohorts.append(
+            {
+                "trim": trim,
+                "msrp_bucket": bucket,
+                "listing_count": len(discounts),
+                "discounts": discounts,
+                "updated_at": now,
+            }
+        )
+    db.execute(delete(CohortStats))
+    if cohorts:
+        db.execute(insert(CohortStats), cohorts)
+    db.commit()
+    return len(cohorts)
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Rebuild comparable-cohort discount statistics.").parse_args()
+    db = SessionLocal()
+    try:
+        rebuilt = rebuild_cohorts(db)
+    finally:
+        db.close()
+    cache.invalidate()
+    logger.info("Rebuilt {} cohorts", rebuilt)
@@ -9,6 +9,7 @@ class Settings(BaseSettings):
         alias="DATABASE_URL",
     )
     redis_url: str = Field(default="redis://redis:6379/0", alias="REDIS_URL")
+    response_cache_ttl_s: int = Field(default=86400, alias="RESPONSE_CACHE_TTL_S")
     single_user_mode: bool = Field(default=True, alias="SINGLE_USER_MODE")
     auth_secret: str = Field(default="dev-secret", alias="AUTH_SECRET")
     alert_email_sender: str = Field(default="alerts@i7scanner.local", alias="ALERT_EMAIL_SENDER")
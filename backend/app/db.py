@@ -1,15 +1,32 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from .config import settings
 
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+psycopg",
+    "postgresql+psycopg": "postgresql+psycopg",
+    "postgresql+psycopg2": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
 
 class Base(DeclarativeBase):
     pass
 
 
+def async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    return url.set(drivername=_ASYNC_DRIVERS.get(url.drivername, url.drivername)).render_as_string(hide_password=False)
+
+
 engine = create_engine(settings.database_url, pool_pre_ping=True)
 SessionLocal = sessionmaker(bind=engine)
 
+async_engine = create_async_engine(async_database_url(settings.database_url), pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 
 def get_db():
     db = SessionLocal()
@@ -17,3 +34,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
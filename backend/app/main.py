@@ -1,53 +1,189 @@
-from fastapi import FastAPI, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from sqlalchemy import Select, and_, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+import heapq
 from datetime import datetime
+from operator import itemgetter
+from typing import Literal
 from loguru import logger
-from .db import get_db
+from .db import get_async_db
 from .auth import require_auth
-from . import models, schemas, scoring, playbook
+from .cache import cached_response, request_key
+from . import cohorts, models, pagination, ranking, schemas, scoring, playbook
 
 # FastAPI chosen for fast async APIs with minimal overhead and strong typing for scraping pipelines.
 app = FastAPI(title="i7 Loaner Deal Scanner")
 
 
-@app.get("/health")
-async def health():
-    return {"status": "ok"}
+_SORT_COLUMNS = {
+    "score": models.Listing.score,
+    "discount": models.Listing.discount_percent,
+    "recent": models.Listing.date_last_seen,
+}
+_SCORE_COLUMNS = {"score", "discount_percent", "value_components", "scoring_version"}
+# Stored score columns only mean something for rows scored under the current SCORING_VERSION.
+_CURRENT = models.Listing.scoring_version == scoring.SCORING_VERSION
+_STALE = or_(models.Listing.scoring_version.is_(None), models.Listing.scoring_version != scoring.SCORING_VERSION)
+# The fields scoring.value_component_arrays reads.
+_COMPONENT_FIELDS = (
+    models.Listing.msrp,
+    models.Listing.advertised_price,
+    models.Listing.miles,
+    models.Listing.incentives,
+    models.Listing.lease_terms,
+    models.Listing.trim,
+)
 
 
-@app.get("/listings", response_model=list[schemas.DealWithScore])
-async def list_listings(
-    model: str | None = Query(default=None),
-    db: Session = Depends(get_db),
-    _auth: bool = Depends(require_auth),
-):
-    query = db.query(models.Listing).filter(models.Listing.listing_status == "active")
+def _deal_with_score(listing: models.Listing, score: dict | None = None) -> schemas.DealWithScore:
+    fields = {key: value for key, value in listing.__dict__.items() if key not in _SCORE_COLUMNS}
+    return schemas.DealWithScore(
+        **fields,
+        score=schemas.DealScore(
+            **(score or scoring.stored_value_score(listing.__dict__)),
+            negotiation_playbook=playbook.build_playbook(listing.__dict__),
+        ),
+    )
+
+
+def _deals_with_scores(listings: list[models.Listing]) -> list[schemas.DealWithScore]:
+    scores = scoring.stored_value_scores([listing.__dict__ for listing in listings])
+    return [_deal_with_score(listing, score) for listing, score in zip(listings, scores)]
+
+
+async def _get_listing(db: AsyncSession, listing_id: str) -> models.Listing | None:
+    return await db.scalar(select(models.Listing).where(models.Listing.listing_id == listing_id))
+
+
+def _filter_listings(
+    query: Select,
+    model: str | None = None,
+    state: list[str] | None = None,
+    max_miles: int | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    trim: str | None = None,
+    min_discount: float | None = None,
+) -> Select:
     if model:
-        query = query.filter(models.Listing.model == model)
-    listings = query.all()
-    results = []
-    for listing in listings:
-        score = scoring.compute_value_score(listing.__dict__)
-        playbook_data = playbook.build_playbook(listing.__dict__)
-        results.append(
-            schemas.DealWithScore(
-                **listing.__dict__,
-                score=schemas.DealScore(
-                    **score,
-                    negotiation_playbook=playbook_data,
+        query = query.where(models.Listing.model == model)
+    if state:
+        query = query.where(models.Listing.dealer_state.in_([code.upper() for code in state]))
+    if max_miles is not None:
+        query = query.where(models.Listing.miles <= max_miles)
+    if min_price is not None:
+        query = query.where(models.Listing.advertised_price >= min_price)
+    if max_price is not None:
+        query = query.where(models.Listing.advertised_price <= max_price)
+    if trim:
+        query = query.where(models.Listing.trim == trim)
+    if min_discount is not None and min_discount > 0:
+        listing = models.Listing
+        query = query.where(
+            or_(
+                and_(_CURRENT, listing.discount_percent >= min_discount),
+                # Stale rows fall back to the discount computed from price and MSRP.
+                and_(
+                    _STALE,
+                    listing.msrp > 0,
+                    listing.advertised_price > 0,
+                    (listing.msrp - listing.advertised_price) * 100 >= min_discount * listing.msrp,
                 ),
             )
         )
-    return results
+    return query
 
 
-@app.get("/listings/{listing_id}", response_model=schemas.DealWithScore)
-async def get_listing(
-    listing_id: str,
-    db: Session = Depends(get_db),
-    _auth: bool = Depends(require_auth),
-):
-    listing = db.query(models.Listing).filter(models.Listing.listing_id == listing_id).first()
+async def listing_page(
+    db: AsyncSession,
+    model: str | None = None,
+    state: list[str] | None = None,
+    max_miles: int | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    trim: str | None = None,
+    min_discount: float | None = None,
+    sort: str = "score",
+    limit: int = 50,
+    cursor: str | None = None,
+) -> schemas.ListingPage:
+    column = _SORT_COLUMNS[sort]
+    query = select(models.Listing).where(models.Listing.listing_status == "active", column.is_not(None))
+    if sort != "recent":
+        # Until a rescore catches up, stale rows are only listed by recency, scored on the fly.
+        query = query.where(_CURRENT)
+    query = _filter_listings(
+        query,
+        model=model,
+        state=state,
+        max_miles=max_miles,
+        min_price=min_price,
+        max_price=max_price,
+        trim=trim,
+        min_discount=min_discount,
+    )
+    if cursor:
+        try:
+            value, last_id = pagination.decode_cursor(cursor, sort)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        query = query.where(tuple_(column, models.Listing.id) < tuple_(value, last_id))
+    listings = (
+        await db.scalars(query.order_by(column.desc(), models.Listing.id.desc()).limit(limit + 1))
+    ).all()
+    page = listings[:limit]
+    next_cursor = None
+    if len(listings) > limit:
+        next_cursor = pagination.encode_cursor(sort, getattr(page[-1], column.key), page[-1].id)
+    return schemas.ListingPage(items=_deals_with_scores(page), next_cursor=next_cursor)
+
+
+async def listing_ranking(
+    db: AsyncSession,
+    weights: dict[str, float],
+    k: int = 20,
+    model: str | None = None,
+    state: list[str] | None = None,
+    max_miles: int | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    trim: str | None = None,
+    min_discount: float | None = None,
+) -> schemas.RankingResponse:
+    filters = dict(
+        model=model,
+        state=state,
+        max_miles=max_miles,
+        min_price=min_price,
+        max_price=max_price,
+        trim=trim,
+        min_discount=min_discount,
+    )
+    active = models.Listing.listing_status == "active"
+    current_query = select(models.Listing.id, models.Listing.value_components).where(active, _CURRENT)
+    current = await db.execute(_filter_listings(current_query, **filters).order_by(models.Listing.id))
+    # Rows scored under an older SCORING_VERSION get their components recomputed from their fields.
+    stale_query = select(models.Listing.id, *_COMPONENT_FIELDS).where(active, _STALE)
+    stale = (await db.execute(_filter_listings(stale_query, **filters).order_by(models.Listing.id))).all()
+    components = scoring.value_component_arrays([row._asdict() for row in stale])
+    recomputed = [
+        (row.id, dict(zip(components, values)))
+        for row, *values in zip(stale, *(column.tolist() for column in components.values()))
+    ]
+    # Both come back in id order, so a linear merge keeps ties in id order without sorting every row.
+    top = ranking.top_k(list(heapq.merge(current.all(), recomputed, key=itemgetter(0))), weights, k)
+    found = await db.scalars(select(models.Listing).where(models.Listing.id.in_([row_id for _, row_id in top])))
+    listings = {listing.id: listing for listing in found}
+    scores = scoring.stored_value_scores([listings[row_id].__dict__ for _, row_id in top])
+    items = [
+        _deal_with_score(listings[row_id], {**stored, "score": round(score, 4)})
+        for (score, row_id), stored in zip(top, scores)
+    ]
+    return schemas.RankingResponse(weights=weights, items=items)
+
+
+async def listing_detail(db: AsyncSession, listing_id: str) -> schemas.DealWithScore:
+    listing = await _get_listing(db, listing_id)
     if not listing:
         return schemas.DealWithScore(
             listing_id=listing_id,
@@ -65,39 +201,202 @@ async def get_listing(
             date_last_seen=datetime.utcnow(),
             last_scraped_at=datetime.utcnow(),
         )
-    score = scoring.compute_value_score(listing.__dict__)
-    playbook_data = playbook.build_playbook(listing.__dict__)
-    return schemas.DealWithScore(
-        **listing.__dict__,
-        score=schemas.DealScore(
-            **score,
-            negotiation_playbook=playbook_data,
+    return _deal_with_score(listing)
+
+
+async def listing_comps(db: AsyncSession, listing_id: str) -> schemas.CompsResponse:
+    listing = await _get_listing(db, listing_id)
+    if not listing:
+        return schemas.CompsResponse(
+            listing_id=listing_id,
+            comps=[],
+            median_discount_percent=0,
+            percentile=0,
+        )
+    bucket = cohorts.msrp_bucket(listing.msrp)
+    stats, comps = None, []
+    if listing.trim and bucket is not None:
+        stats = await db.scalar(
+            select(models.CohortStats).where(
+                models.CohortStats.trim == listing.trim, models.CohortStats.msrp_bucket == bucket
+            )
+        )
+        low, high = cohorts.msrp_range(bucket)
+        comps = (
+            await db.scalars(
+                select(models.Listing)
+                .where(
+                    models.Listing.listing_status == "active",
+                    models.Listing.trim == listing.trim,
+                    models.Listing.msrp >= low,
+                    models.Listing.msrp < high,
+                    models.Listing.id != listing.id,
+                )
+                .order_by(func.abs(models.Listing.msrp - listing.msrp), models.Listing.id)
+                .limit(5)
+            )
+        ).all()
+    discounts = stats.discounts if stats else []
+    listing_discount = scoring.stored_value_score(listing.__dict__)["discount_percent"]
+    return schemas.CompsResponse(
+        listing_id=listing_id,
+        comps=_deals_with_scores(comps),
+        median_discount_percent=cohorts.median(discounts),
+        percentile=round(cohorts.percentile(discounts, listing_discount), 2),
+        cohort_size=len(discounts),
+    )
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/listings", response_model=schemas.ListingPage)
+async def list_listings(
+    request: Request,
+    model: str | None = Query(default=None),
+    state: list[str] | None = Query(default=None),
+    max_miles: int | None = Query(default=None, ge=0),
+    min_price: float | None = Query(default=None, ge=0),
+    max_price: float | None = Query(default=None, ge=0),
+    trim: str | None = Query(default=None),
+    min_discount: float | None = Query(default=None, description="Minimum discount in percent"),
+    sort: Literal["score", "discount", "recent"] = Query(default="score"),
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = Query(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    _auth: bool = Depends(require_auth),
+):
+    return await cached_response(
+        request,
+        lambda: listing_page(
+            db,
+            model=model,
+            state=state,
+            max_miles=max_miles,
+            min_price=min_price,
+            max_price=max_price,
+            trim=trim,
+            min_discount=min_discount,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
         ),
     )
 
 
+@app.get("/rankings", response_model=schemas.RankingResponse)
+async def rank_listings(
+    request: Request,
+    weights: str | None = Query(
+        default=None,
+        description="Comma-separated component:weight pairs, e.g. lease_quality:0.6,discount_percent:0.4",
+    ),
+    k: int = Query(default=20, ge=1, le=200),
+    model: str | None = Query(default=None),
+    state: list[str] | None = Query(default=None),
+    max_miles: int | None = Query(default=None, ge=0),
+    min_price: float | None = Query(default=None, ge=0),
+    max_price: float | None = Query(default=None, ge=0),
+    trim: str | None = Query(default=None),
+    min_discount: float | None = Query(default=None, description="Minimum discount in percent"),
+    db: AsyncSession = Depends(get_async_db),
+    _auth: bool = Depends(require_auth),
+):
+    try:
+        profile = ranking.parse_weights(weights)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    # Equivalent weight specs (reordered, zero weights, the defaults) share one cached response.
+    key = request_key(request, weights=ranking.profile_key(profile))
+    return await cached_response(
+        request,
+        lambda: listing_ranking(
+            db,
+            profile,
+            k=k,
+            model=model,
+            state=state,
+            max_miles=max_miles,
+            min_price=min_price,
+            max_price=max_price,
+            trim=trim,
+            min_discount=min_discount,
+        ),
+        key=key,
+    )
+
+
+@app.get("/listings/{listing_id}", response_model=schemas.DealWithScore)
+async def get_listing(
+    request: Request,
+    listing_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    _auth: bool = Depends(require_auth),
+):
+    return await cached_response(request, lambda: listing_detail(db, listing_id))
+
+
+@app.get("/listings/{listing_id}/comps", response_model=schemas.CompsResponse)
+async def get_comps(
+    request: Request,
+    listing_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    _auth: bool = Depends(require_auth),
+):
+    return await cached_response(request, lambda: listing_comps(db, listing_id))
+
+
+@app.get("/listings/{listing_id}/sources", response_model=list[schemas.ListingSource])
+async def list_listing_sources(
+    listing_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    _auth: bool = Depends(require_auth),
+):
+    return (
+        await db.scalars(
+            select(models.ListingSource)
+            .where(models.ListingSource.listing_id == listing_id)
+            .order_by(models.ListingSource.first_seen)
+        )
+    ).all()
+
+
 @app.post("/alerts", response_model=schemas.Alert)
 async def create_alert(
     alert: schemas.AlertCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _auth: bool = Depends(require_auth),
 ):
     record = models.Alert(**alert.model_dump())
     db.add(record)
-    db.commit()
-    db.refresh(record)
+    await db.commit()
+    await db.refresh(record)
     return record
 
 
 @app.get("/admin/stats", response_model=schemas.AdminStats)
 async def admin_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _auth: bool = Depends(require_auth),
 ):
-    active_count = db.query(models.Listing).filter(models.Listing.listing_status == "active").count()
-    job = db.query(models.ScrapeJob).order_by(models.ScrapeJob.id.desc()).first()
+    active_count = await db.scalar(
+        select(func.count()).select_from(models.Listing).where(models.Listing.listing_status == "active")
+    )
+    job = await db.scalar(
+        select(models.ScrapeJob)
+        .where(models.ScrapeJob.parent_id.is_(None))
+        .order_by(models.ScrapeJob.id.desc())
+        .limit(1)
+    )
     blocked = job.blocked_domains if job and job.blocked_domains else []
-    failures = {domain: job.failures for domain in blocked}
+    metrics = job.metrics if job and job.metrics else {}
+    failures = {
+        domain: stats["failures"]
+        for domain, stats in metrics.get("domains", {}).items()
+        if stats["failures"]
+    }
     last_updated = job.finished_at if job else None
     logger.info("Admin stats fetched")
     return schemas.AdminStats(
@@ -105,56 +404,34 @@ async def admin_stats(
         blocked_domains=blocked,
         failures_by_domain=failures,
         last_updated=last_updated,
+        last_job_metrics=metrics or None,
     )
 
 
-@app.get("/listings/{listing_id}/comps", response_model=schemas.CompsResponse)
-async def get_comps(
-    listing_id: str,
-    db: Session = Depends(get_db),
+@app.get("/admin/jobs", response_model=list[schemas.ScrapeJobSummary])
+async def list_scrape_jobs(
+    limit: int = Query(default=20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
     _auth: bool = Depends(require_auth),
 ):
-    listing = db.query(models.Listing).filter(models.Listing.listing_id == listing_id).first()
-    if not listing:
-        return schemas.CompsResponse(
-            listing_id=listing_id,
-            comps=[],
-            median_discount_percent=0,
-            percentile=0,
+    return (
+        await db.scalars(
+            select(models.ScrapeJob)
+            .where(models.ScrapeJob.parent_id.is_(None))
+            .order_by(models.ScrapeJob.id.desc())
+            .limit(limit)
         )
-    msrp_bucket = (listing.msrp or 0) // 10000
-    comps = (
-        db.query(models.Listing)
-        .filter(models.Listing.trim == listing.trim)
-        .filter((models.Listing.msrp // 10000) == msrp_bucket)
-        .limit(5)
-        .all()
-    )
-    comps_scored = []
-    discounts = []
-    for comp in comps:
-        score = scoring.compute_value_score(comp.__dict__)
-        playbook_data = playbook.build_playbook(comp.__dict__)
-        discounts.append(score["discount_percent"])
-        comps_scored.append(
-            schemas.DealWithScore(
-                **comp.__dict__,
-                score=schemas.DealScore(
-                    **score,
-                    negotiation_playbook=playbook_data,
-                ),
-            )
+    ).all()
+
+
+@app.get("/admin/jobs/{job_id}/shards", response_model=list[schemas.ScrapeJobShard])
+async def list_scrape_job_shards(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    _auth: bool = Depends(require_auth),
+):
+    return (
+        await db.scalars(
+            select(models.ScrapeJob).where(models.ScrapeJob.parent_id == job_id).order_by(models.ScrapeJob.id)
         )
-    median_discount = sorted(discounts)[len(discounts) // 2] if discounts else 0
-    listing_discount = scoring.compute_value_score(listing.__dict__)["discount_percent"]
-    percentile = (
-        sum(1 for discount in discounts if discount <= listing_discount) / len(discounts) * 100
-        if discounts
-        else 0
-    )
-    return schemas.CompsResponse(
-        listing_id=listing_id,
-        comps=comps_scored,
-        median_discount_percent=median_discount,
-        percentile=round(percentile, 2),
-    )
+    ).all()
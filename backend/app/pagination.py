@@ -0,0 +1,26 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(sort: str, value: float | datetime, row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[float | datetime, int]:
+    """Inverse of encode_cursor; raises ValueError if the cursor is malformed or from another sort."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, row_id = json.loads(payload)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Malformed cursor") from exc
+    if cursor_sort != sort or not isinstance(row_id, int):
+        raise ValueError("Cursor does not match this sort order")
+    if sort == "recent":
+        return datetime.fromisoformat(value), row_id
+    if not isinstance(value, (int, float)):
+        raise ValueError("Malformed cursor")
+    return value, row_id
@@ -1,11 +1,15 @@
 import hashlib
 import re
+from dataclasses import dataclass
 from bs4 import BeautifulSoup
 
 LOANER_KEYWORDS = ["loaner", "demo", "service loaner", "executive demo"]
 VIN_REGEX = re.compile(r"\b([A-HJ-NPR-Z0-9]{17})\b")
 MILES_REGEX = re.compile(r"(\d{1,3}(?:,\d{3})?)\s*(?:mi|miles)", re.IGNORECASE)
 PRICE_REGEX = re.compile(r"\$\s?(\d{2,3}(?:,\d{3})+)" )
+_STOCK_LABEL = "stock"
+_STOCK_VALUE = r"\s*(?:#|no\.?|number)\s*:?\s*([A-Z0-9][A-Z0-9-]{2,19})\b"
+STOCK_REGEX = re.compile(rf"\b{_STOCK_LABEL}{_STOCK_VALUE}", re.IGNORECASE)
 
 
 def hash_listing_id(url: str) -> str:
@@ -13,8 +17,8 @@ def hash_listing_id(url: str) -> str:
 
 
 def detect_loaner(text: str) -> tuple[bool, list[str]]:
-    matches = [kw for kw in LOANER_KEYWORDS if kw in text.lower()]
-    return bool(matches), matches
+    scan = scan_fields(text)
+    return scan.is_loaner, scan.keywords
 
 
 def extract_vin(text: str) -> str | None:
@@ -33,6 +37,83 @@ def extract_prices(text: str) -> list[float]:
     return [float(price.replace(",", "")) for price in PRICE_REGEX.findall(text)]
 
 
+def extract_stock_no(text: str) -> str | None:
+    match = STOCK_REGEX.search(text)
+    return match.group(1).upper() if match else None
+
+
+@dataclass
+class FieldScan:
+    keywords: list[str]
+    vin: str | None
+    miles: int | None
+    stock_no: str | None
+    prices: list[float]
+
+    @property
+    def is_loaner(self) -> bool:
+        return bool(self.keywords)
+
+
+def _ending_at_last_letter(word: str) -> str:
+    return f"(?<={re.escape(word[:-1])}){re.escape(word[-1])}"
+
+
+def _case_insensitive(pattern: str) -> str:
+    return f"(?i:{pattern})"
+
+
+_SCAN_FIELDS = {
+    **{
+        f"keyword_{LOANER_KEYWORDS.index(kw)}": _case_insensitive(_ending_at_last_letter(kw))
+        for kw in sorted(LOANER_KEYWORDS, key=len, reverse=True)
+    },
+    "vin": VIN_REGEX.pattern,
+    "miles": _case_insensitive(MILES_REGEX.pattern),
+    "price": PRICE_REGEX.pattern,
+    "stock_no": _case_insensitive(rf"(?<=\b{_STOCK_LABEL[:-1]}){_STOCK_LABEL[-1]}{_STOCK_VALUE}"),
+}
+_WORD_ENDS = {char for word in [*LOANER_KEYWORDS, _STOCK_LABEL] for char in (word[-1].lower(), word[-1].upper())}
+# re only skips quickly past characters that can't begin a match when a pattern starts with a character
+# set. The scan stops at characters that start a VIN, mileage or price, or end a keyword or the stock
+# label; anchoring the words at their last letter keeps "l", "d", "s" and "e" out of the set. Each stop
+# runs the field patterns in a lookahead inside a one-character lookbehind. Only keywords that end one
+# another ("loaner", "service loaner") share a stop, so resuming one character after each stop finds
+# everything the individual extractors would, overlapping matches included.
+_SCAN_REGEX = re.compile(
+    rf"[$0-9A-Z{''.join(sorted(_WORD_ENDS))}]"
+    rf"(?<=(?=(?:{'|'.join(f'(?P<{name}>{pattern})' for name, pattern in _SCAN_FIELDS.items())})).)"
+)
+
+
+def scan_fields(text: str) -> FieldScan:
+    """Every listing field in one left-to-right pass, matching the individual extractors."""
+    keywords: set[str] = set()
+    prices: list[float] = []
+    first: dict[str, str] = {}
+    position = 0
+    while match := _SCAN_REGEX.search(text, position):
+        field = match.lastgroup
+        if field.startswith("keyword_"):
+            found = LOANER_KEYWORDS[int(field.removeprefix("keyword_"))]
+            keywords.update(kw for kw in LOANER_KEYWORDS if found.endswith(kw))
+        else:
+            # The field's own capture group directly follows its named group.
+            value = match.group(_SCAN_REGEX.groupindex[field] + 1)
+            if field == "price":
+                prices.append(float(value.replace(",", "")))
+            else:
+                first.setdefault(field, value)
+        position = match.start() + 1
+    return FieldScan(
+        keywords=[kw for kw in LOANER_KEYWORDS if kw in keywords],
+        vin=first.get("vin"),
+        miles=int(first["miles"].replace(",", "")) if "miles" in first else None,
+        stock_no=first["stock_no"].upper() if "stock_no" in first else None,
+        prices=prices,
+    )
+
+
 def text_from_html(html: str) -> str:
     soup = BeautifulSoup(html, "html.parser")
     return soup.get_text(" ")
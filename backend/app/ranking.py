@@ -0,0 +1,42 @@
+import heapq
+import math
+from collections.abc import Sequence
+from operator import itemgetter
+import numpy as np
+from .scoring import DEFAULT_WEIGHTS, weighted_scores
+
+
+def parse_weights(spec: str | None) -> dict[str, float]:
+    """Parse "lease_quality:0.6,discount_percent:0.4"; raises ValueError for unknown or invalid weights."""
+    if not spec:
+        return dict(DEFAULT_WEIGHTS)
+    weights: dict[str, float] = {}
+    for part in spec.split(","):
+        key, _, value = part.partition(":")
+        key = key.strip()
+        if key not in DEFAULT_WEIGHTS:
+            raise ValueError(f"Unknown weight {key!r}; expected one of {', '.join(DEFAULT_WEIGHTS)}")
+        try:
+            weight = float(value)
+        except ValueError as exc:
+            raise ValueError(f"Weight for {key!r} must be a number") from exc
+        if not math.isfinite(weight) or weight < 0:
+            raise ValueError(f"Weight for {key!r} must be a non-negative number")
+        weights[key] = weight
+    if not any(weights.values()):
+        raise ValueError("At least one weight must be positive")
+    # Canonical order, so equal profiles sum identically and share a cache entry.
+    return {key: weights[key] for key in DEFAULT_WEIGHTS if weights.get(key)}
+
+
+def profile_key(weights: dict[str, float]) -> str:
+    return ",".join(f"{key}:{weight!r}" for key, weight in weights.items())
+
+
+def top_k(rows: Sequence[tuple[int, dict]], weights: dict[str, float], k: int) -> list[tuple[float, int]]:
+    """(score, id) of the k best (id, value_components) rows under weights, best first; ties keep row order."""
+    components = {
+        key: np.array([row_components[key] for _, row_components in rows], dtype=float) for key in DEFAULT_WEIGHTS
+    }
+    scores = weighted_scores(components, weights)
+    return heapq.nlargest(k, zip(scores.tolist(), (row_id for row_id, _ in rows)), key=itemgetter(0))
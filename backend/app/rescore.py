@@ -0,0 +1,66 @@
+import argparse
+from loguru import logger
+from sqlalchemy import bindparam, or_, select
+from sqlalchemy.orm import Session
+from . import cache
+from .cohorts import rebuild_cohorts
+from .db import SessionLocal
+from .models import Listing
+from .scoring import SCORING_VERSION, score_columns
+
+
+def rescore(db: Session, batch_size: int = 500, rescore_all: bool = False) -> int:
+    """Recompute stored scores in id order, one committed batch at a time."""
+    table = Listing.__table__
+    update = (
+        table.update()
+        .where(table.c.id == bindparam("row_id"))
+        .values(
+            score=bindparam("new_score"),
+            discount_percent=bindparam("new_discount_percent"),
+            value_components=bindparam("new_value_components"),
+            scoring_version=bindparam("new_scoring_version"),
+        )
+    )
+    query = select(
+        Listing.id,
+        Listing.msrp,
+        Listing.advertised_price,
+        Listing.miles,
+        Listing.trim,
+        Listing.incentives,
+        Listing.lease_terms,
+    ).order_by(Listing.id).limit(batch_size)
+    if not rescore_all:
+        query = query.where(or_(Listing.scoring_version.is_(None), Listing.scoring_version != SCORING_VERSION))
+
+    rescored = last_id = 0
+    while rows := db.execute(query.where(Listing.id > last_id)).all():
+        db.execute(
+            update,
+            [
+                {"row_id": row.id, **{f"new_{key}": value for key, value in columns.items()}}
+                for row, columns in zip(rows, score_columns([row._asdict() for row in rows]))
+            ],
+        )
+        db.commit()
+        rescored += len(rows)
+        last_id = rows[-1].id
+    return rescored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute stored listing scores after a scoring change.")
+    parser.add_argument("--all", action="store_true", help="Rescore every listing, not only stale versions.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        rescored = rescore(db, args.batch_size, args.all)
+        if rescored:
+            rebuild_cohorts(db)
+    finally:
+        db.close()
+    if rescored:
+        cache.invalidate()
+    logger.info("Rescored {} listings with scoring version {}", rescored, SCORING_VERSION)
@@ -15,6 +15,7 @@ class ListingBase(BaseModel):
     aggregator_url: str | None = None
     stock_no: str | None = None
     vin: str | None = None
+    vehicle_key: str | None = None
     year: int | None = None
     model: str
     trim: str | None = None
@@ -40,6 +41,14 @@ class Listing(ListingBase):
     last_scraped_at: datetime
 
 
+class ListingSource(BaseModel):
+    url: str
+    source: str
+    source_listing_id: str
+    first_seen: datetime
+    last_seen: datetime
+
+
 class Alert(BaseModel):
     id: int
     user_email: str
@@ -58,11 +67,51 @@ class AlertCreate(BaseModel):
     states: list[str] | None = None
 
 
+class StageTiming(BaseModel):
+    count: int
+    seconds: float
+
+
+class DomainMetrics(BaseModel):
+    requests: int
+    failures: int
+    bytes: int
+    fetch_seconds: float
+    latency_histogram: dict[str, int]
+
+
+class JobMetrics(BaseModel):
+    elapsed_s: float = 0.0
+    pages: int = 0
+    unchanged: int = 0
+    blocked: int = 0
+    pages_per_s: float = 0.0
+    stages: dict[str, StageTiming] = {}
+    domains: dict[str, DomainMetrics] = {}
+
+
+class ScrapeJobSummary(BaseModel):
+    id: int
+    source: str
+    status: str
+    started_at: datetime | None
+    finished_at: datetime | None
+    failures: int
+    blocked_domains: list[str] | None = None
+    metrics: JobMetrics | None = None
+
+
+class ScrapeJobShard(ScrapeJobSummary):
+    parent_id: int
+    domain: str | None
+
+
 class AdminStats(BaseModel):
     active_listings: int
     blocked_domains: list[str]
     failures_by_domain: dict[str, int]
     last_updated: datetime | None
+    last_job_metrics: JobMetrics | None = None
 
 
 class DealScore(BaseModel):
@@ -76,8 +125,19 @@ class DealWithScore(Listing):
     score: DealScore
 
 
+class ListingPage(BaseModel):
+    items: list[DealWithScore]
+    next_cursor: str | None = None
+
+
+class RankingResponse(BaseModel):
+    weights: dict[str, float]
+    items: list[DealWithScore]
+
+
 class CompsResponse(BaseModel):
     listing_id: str
     comps: list[DealWithScore]
     median_discount_percent: float
     percentile: float
+    cohort_size: int = 0
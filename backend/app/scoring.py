@@ -1,10 +1,16 @@
+import numpy as np
 from .config import settings
 
+# Bump whenever DEFAULT_WEIGHTS, TRIM_BASELINES or a score_* function changes, then run `python -m app.rescore`.
+SCORING_VERSION = 1
+
 TRIM_BASELINES = {
     "eDrive50": 105000,
     "xDrive60": 120000,
     "M70": 145000,
 }
+_TRIM_SCORES = {trim: baseline / max(TRIM_BASELINES.values()) for trim, baseline in TRIM_BASELINES.items()}
+_DEFAULT_TRIM_SCORE = 120000 / max(TRIM_BASELINES.values())
 
 
 DEFAULT_WEIGHTS = {
@@ -37,8 +43,7 @@ def score_miles(miles: int | None) -> float:
 def score_trim(trim: str | None) -> float:
     if not trim:
         return 0.5
-    baseline = TRIM_BASELINES.get(trim, 120000)
-    return baseline / max(TRIM_BASELINES.values())
+    return _TRIM_SCORES.get(trim, _DEFAULT_TRIM_SCORE)
 
 
 def score_incentives(incentives: list[dict] | None) -> float:
@@ -79,3 +84,102 @@ def compute_value_score(listing: dict, weights: dict | None = None) -> dict:
         "discount_percent": round(discount_percent * 100, 2),
         "value_components": components,
     }
+
+
+def value_component_arrays(listings: list[dict]) -> dict[str, np.ndarray]:
+    """The score_* components of many listings as columns, one array per component."""
+    msrp = np.array([listing.get("msrp") or 0 for listing in listings], dtype=float)
+    price = np.array([listing.get("advertised_price") or 0 for listing in listings], dtype=float)
+    miles = np.array([listing.get("miles") for listing in listings], dtype=float)
+    incentives = [listing.get("incentives") or [] for listing in listings]
+    leases = [listing.get("lease_terms") or {} for listing in listings]
+    trims = [listing.get("trim") for listing in listings]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        discount = np.where((msrp != 0) & (price != 0), np.maximum((msrp - price) / msrp, 0.0), 0.0)
+    miles_score = np.select(
+        [np.isnan(miles), miles <= 5000, miles <= 10000, miles <= 15000], [0.3, 1.0, 0.7, 0.4], default=0.1
+    )
+    trim_score = np.array([_TRIM_SCORES.get(trim, _DEFAULT_TRIM_SCORE) if trim else 0.5 for trim in trims])
+    incentive_total = np.array([sum(item.get("amount", 0) for item in items) for items in incentives], dtype=float)
+    stackable = np.array([any(item.get("stackable") for item in items) for items in incentives], dtype=bool)
+    incentive_score = np.where(
+        np.array([bool(items) for items in incentives], dtype=bool),
+        np.minimum(incentive_total / 10000, 1.0) + np.where(stackable, 0.2, 0.0),
+        0.2,
+    )
+    due_at_signing = np.array([lease.get("due_at_signing") or 0 for lease in leases], dtype=float)
+    payment = np.array([lease.get("payment") or 0 for lease in leases], dtype=float)
+    lease_score = np.where(
+        np.array([bool(lease) for lease in leases], dtype=bool),
+        np.maximum(1.0 - np.where(due_at_signing > 3000, 0.3, 0.0) - np.where(payment > 1500, 0.3, 0.0), 0.1),
+        0.2,
+    )
+    return {
+        "discount_percent": discount,
+        "miles": miles_score,
+        "trim_baseline": trim_score,
+        "incentives": incentive_score,
+        "lease_quality": lease_score,
+    }
+
+
+def weighted_scores(components: dict[str, np.ndarray], weights: dict | None = None) -> np.ndarray:
+    """Unrounded scores, summed in weights order exactly like compute_value_score."""
+    weights = weights or DEFAULT_WEIGHTS
+    score = np.zeros(len(components["discount_percent"]))
+    for key, weight in weights.items():
+        score = score + components[key] * weight
+    return score
+
+
+def compute_value_scores(listings: list[dict], weights: dict | None = None) -> list[dict]:
+    """compute_value_score for many listings at once; results are identical to the scalar path."""
+    if not listings:
+        return []
+    components = value_component_arrays(listings)
+    score = weighted_scores(components, weights)
+    # Python's round() rather than np.round so the stored values match compute_value_score exactly.
+    return [
+        {
+            "score": round(total, 4),
+            "discount_percent": round(percent, 2),
+            "value_components": {
+                "discount_percent": discount_value,
+                "miles": miles_value,
+                "trim_baseline": trim_value,
+                "incentives": incentive_value,
+                "lease_quality": lease_value,
+            },
+        }
+        for total, percent, discount_value, miles_value, trim_value, incentive_value, lease_value in zip(
+            score.tolist(),
+            (components["discount_percent"] * 100).tolist(),
+            *(column.tolist() for column in components.values()),
+        )
+    ]
+
+
+def score_columns(listings: list[dict]) -> list[dict]:
+    return [{**result, "scoring_version": SCORING_VERSION} for result in compute_value_scores(listings)]
+
+
+def stored_value_score(listing: dict) -> dict:
+    """The score written with the listing, or a fresh one if it predates SCORING_VERSION."""
+    if listing.get("scoring_version") != SCORING_VERSION:
+        return compute_value_score(listing)
+    return {
+        "score": listing["score"],
+        "discount_percent": listing["discount_percent"],
+        "value_components": listing["value_components"],
+    }
+
+
+def stored_value_scores(listings: list[dict]) -> list[dict]:
+    """stored_value_score for many listings, scoring any stale ones in a single batch."""
+    stale = [listing for listing in listings if listing.get("scoring_version") != SCORING_VERSION]
+    fresh = iter(compute_value_scores(stale))
+    return [
+        next(fresh) if listing.get("scoring_version") != SCORING_VERSION else stored_value_score(listing)
+        for listing in listings
+    ]
@@ -0,0 +1,122 @@
+import random
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).resolve().parents[1] / "tests" / "fixtures"
+VIN_CHARS = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+TRIMS = ["eDrive50", "xDrive60", "M70"]
+STATES = ["CA", "TX", "FL", "NY", "NJ", "IL", "WA", "GA"]
+
+_VIN = re.compile(r"\b[A-HJ-NPR-Z0-9]{17}\b")
+_MILES = re.compile(r"\d{1,3}(?:,\d{3})?(?=\s*(?:mi|miles)\b)", re.IGNORECASE)
+_PRICE = re.compile(r"\$\s?\d{2,3}(?:,\d{3})+")
+_BODY = re.compile(r"<body>(.*)</body>", re.DOTALL)
+
+
+@dataclass
+class SyntheticPage:
+    url: str
+    html: str
+    vin: str | None
+    miles: int
+    msrp: float
+    advertised_price: float
+
+
+@lru_cache(maxsize=None)
+def load_fixtures() -> tuple[str, ...]:
+    return tuple(_BODY.search(path.read_text()).group(1) for path in sorted(FIXTURES_DIR.glob("dealer*.html")))
+
+
+def _vin(rng: random.Random) -> str:
+    return "WBY" + "".join(rng.choice(VIN_CHARS) for _ in range(14))
+
+
+def _money(value: float) -> str:
+    return f"${value:,.0f}"
+
+
+def _head(rng: random.Random) -> str:
+    rules = "".join(
+        f".c{i}{{margin:{rng.randint(0, 24)}px;color:#{rng.randint(0, 0xFFFFFF):06x}}}" for i in range(rng.randint(80, 200))
+    )
+    return f"<head><meta charset='utf-8'><title>BMW i7 for sale</title><style>{rules}</style></head>"
+
+
+def _script(rng: random.Random) -> str:
+    body = "".join(
+        f"function f{i}(a,b){{var x=a*{rng.randint(2, 99)}+b;return x>{rng.randint(100, 999)}?x:a;}}"
+        for i in range(rng.randint(100, 400))
+    )
+    return f"<script>{body}</script>"
+
+
+def _nav(rng: random.Random) -> str:
+    links = "".join(
+        f"<li><a href='/inventory/{kind}?page={i}'>{kind.title()} inventory page {i}</a></li>"
+        for kind in ("new", "used", "certified")
+        for i in range(rng.randint(10, 30))
+    )
+    return f"<header><nav><ul>{links}</ul></nav></header>"
+
+
+def _specs(rng: random.Random) -> str:
+    rows = "".join(
+        f"<tr><td>Option package {i}</td><td>Included with {rng.choice(TRIMS)}</td></tr>"
+        for i in range(rng.randint(20, 60))
+    )
+    return f"<table class='specs'>{rows}</table>"
+
+
+def _similar(rng: random.Random, index: int) -> str:
+    payment = rng.randint(1100, 2400)
+    return (
+        f"<div class='card'><a href='/vdp/similar-{index}-{rng.randint(1000, 9999)}'>"
+        f"2024 BMW i7 {rng.choice(TRIMS)} in {rng.choice(STATES)}</a><span>Lease from {_money(payment)}/mo</span></div>"
+    )
+
+
+def _disclaimer(rng: random.Random) -> str:
+    words = "price excludes tax title license dealer fees and applicable incentives subject to credit approval".split()
+    return "<p class='legal'>" + " ".join(rng.choice(words) for _ in range(rng.randint(60, 160))) + "</p>"
+
+
+def build_page(index: int, seed: int = 0, min_kb: int = 150, max_kb: int = 600) -> SyntheticPage:
+    rng = random.Random(f"{seed}:{index}")
+    fixtures = load_fixtures()
+    content = fixtures[index % len(fixtures)]
+    vin = _vin(rng) if _VIN.search(content) else None
+    miles = rng.randint(500, 14999)
+    msrp = rng.randint(105, 160) * 1000 - 5
+    advertised_price = msrp - rng.randint(4, 25) * 1000
+
+    if vin:
+        content = _VIN.sub(vin, content, count=1)
+    content = _MILES.sub(f"{miles:,}", content, count=1)
+    prices = iter([_money(msrp), _money(advertised_price)])
+    content = _PRICE.sub(lambda match: next(prices, match.group(0)), content)
+
+    target = rng.randint(min_kb, max_kb) * 1024
+    parts = [_nav(rng), f"<main>{content}", _specs(rng)]
+    size = sum(len(part) for part in parts)
+    filler = [_script, _disclaimer, lambda r: _similar(r, len(parts))]
+    while size < target:
+        part = rng.choice(filler)(rng)
+        parts.append(part)
+        size += len(part)
+    html = f"<html>{_head(rng)}<body>{''.join(parts)}</main><footer>{_disclaimer(rng)}</footer></body></html>"
+    return SyntheticPage(
+        url=f"https://dealer{index % 97}.example.com/vdp/{index}",
+        html=html,
+        vin=vin,
+        miles=miles,
+        msrp=float(msrp),
+        advertised_price=float(advertised_price),
+    )
+
+
+def generate_pages(count: int, seed: int = 0, min_kb: int = 150, max_kb: int = 600):
+    for index in range(count):
+        yield build_page(index, seed, min_kb, max_kb)
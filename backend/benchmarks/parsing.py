@@ -0,0 +1,159 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+
+from app import parsing
+from benchmarks.corpus import SyntheticPage, generate_pages
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+
+def _extractors(text: str) -> None:
+    parsing.detect_loaner(text)
+    parsing.extract_vin(text)
+    parsing.extract_miles(text)
+    parsing.extract_prices(text)
+    parsing.extract_stock_no(text)
+
+
+def build_cases() -> tuple[dict[str, Callable[[SyntheticPage, str], object]], list[str]]:
+    cases: dict[str, Callable[[SyntheticPage, str], object]] = {
+        "text_from_html": lambda page, text: parsing.text_from_html(page.html),
+        "extractors": lambda page, text: _extractors(text),
+        "scan_fields": lambda page, text: parsing.scan_fields(text),
+    }
+    skipped = []
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.append(str(REPO_ROOT))
+    try:
+        from worker import parsing as worker_parsing
+        from worker.adapters.aggregator import AggregatorAdapter
+        from worker.adapters.dealer_site import DealerSiteAdapter
+    except ImportError as exc:
+        skipped.append(f"worker: {exc}")
+        return cases, skipped
+
+    cases["worker.parse_html"] = lambda page, text: worker_parsing.parse_html(page.html)
+    scraped_at = datetime(2024, 1, 1)
+    for adapter in (DealerSiteAdapter([]), AggregatorAdapter([])):
+        cases[f"{adapter.source_name}.normalize"] = (
+            lambda page, text, adapter=adapter: adapter.normalize(
+                {"url": page.url, "html": page.html, "scraped_at": scraped_at}
+            )
+        )
+    return cases, skipped
+
+
+def run(pages: int, seed: int, min_kb: int, max_kb: int, memory_sample: int) -> dict:
+    cases, skipped = build_cases()
+    seconds = dict.fromkeys(cases, 0.0)
+    peak = dict.fromkeys(cases, 0)
+    total_bytes = 0
+
+    for index, page in enumerate(generate_pages(pages, seed, min_kb, max_kb)):
+        total_bytes += len(page.html.encode("utf-8"))
+        text = parsing.text_from_html(page.html)
+        for name, case in cases.items():
+            start = time.perf_counter()
+            case(page, text)
+            seconds[name] += time.perf_counter() - start
+        if index < memory_sample:
+            for name, case in cases.items():
+                tracemalloc.start()
+                case(page, text)
+                peak[name] = max(peak[name], tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+    megabytes = total_bytes / 1_000_000
+    results = {
+        name: {
+            "pages_per_s": round(pages / seconds[name], 2) if seconds[name] else None,
+            "mb_per_s": round(megabytes / seconds[name], 2) if seconds[name] else None,
+            "peak_kb": round(peak[name] / 1024, 1),
+        }
+        for name in cases
+    }
+    return {
+        "meta": {
+            "pages": pages,
+            "seed": seed,
+            "min_kb": min_kb,
+            "max_kb": max_kb,
+            "avg_page_kb": round(total_bytes / pages / 1024, 1) if pages else 0,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "skipped": skipped,
+        },
+        "results": results,
+    }
+
+
+def incomparable(current: dict, baseline: dict) -> str | None:
+    """Why current can't be compared with baseline: a different corpus or a different machine."""
+    corpus_keys = ("seed", "min_kb", "max_kb")
+    if any(baseline["meta"][key] != current["meta"][key] for key in corpus_keys):
+        return f"baseline corpus differs ({', '.join(corpus_keys)})"
+    if baseline["meta"].get("machine") != current["meta"]["machine"]:
+        return f"baseline was recorded on {baseline['meta'].get('machine')}, this is {current['meta']['machine']}"
+    return None
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, base in baseline["results"].items():
+        result = current["results"].get(name)
+        if result is None:
+            continue
+        if base["pages_per_s"] and result["pages_per_s"] < base["pages_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['pages_per_s']} pages/s vs baseline {base['pages_per_s']}")
+        if base["peak_kb"] and result["peak_kb"] > base["peak_kb"] * (1 + tolerance):
+            regressions.append(f"{name}: peak {result['peak_kb']} KB vs baseline {base['peak_kb']} KB")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark HTML parsing and listing normalization.")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-kb", type=int, default=150)
+    parser.add_argument("--max-kb", type=int, default=600)
+    parser.add_argument("--memory-sample", type=int, default=25, help="pages measured with tracemalloc")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    current = run(args.pages, args.seed, args.min_kb, args.max_kb, args.memory_sample)
+    for name, result in current["results"].items():
+        print(f"{name:24} {result['pages_per_s']:>10} pages/s {result['mb_per_s']:>8} MB/s {result['peak_kb']:>10} KB peak")
+    for reason in current["meta"]["skipped"]:
+        print(f"skipped {reason}")
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2) + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n")
+        return 0
+    if not args.baseline.exists():
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if reason := incomparable(current, baseline):
+        print(f"{reason}; not comparing")
+        return 0
+    regressions = compare(current, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
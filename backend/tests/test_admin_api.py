@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from app import models
+from app.auth import require_auth
+from app.db import Base, get_async_db
+from app.main import app
+
+STARTED = datetime(2024, 11, 1, 12)
+
+
+def _metrics(pages: int, failures: int = 0) -> dict:
+    return {
+        "elapsed_s": 10.0,
+        "pages": pages,
+        "unchanged": 1,
+        "blocked": 0,
+        "pages_per_s": pages / 10,
+        "stages": {"fetch": {"count": pages, "seconds": 5.0}},
+        "domains": {
+            "dealer.example": {
+                "requests": pages,
+                "failures": failures,
+                "bytes": 1000 * pages,
+                "fetch_seconds": 5.0,
+                "latency_histogram": {"0.1": pages, "+Inf": 0},
+            }
+        },
+    }
+
+
+@pytest.fixture
+def client(tmp_path):
+    """The API over a SQLite file with two sweeps; the second was sharded into two domains."""
+    path = tmp_path / "admin.sqlite3"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        older = models.ScrapeJob(source="all", status="completed", started_at=STARTED, metrics=_metrics(4))
+        latest = models.ScrapeJob(
+            source="all",
+            status="failed",
+            started_at=STARTED + timedelta(hours=6),
+            finished_at=STARTED + timedelta(hours=7),
+            failures=2,
+            blocked_domains=["https://blocked.example/vdp"],
+            metrics=_metrics(9, failures=2),
+        )
+        db.add_all([older, latest])
+        db.flush()
+        db.add_all(
+            [
+                models.ScrapeJob(
+                    source="shard",
+                    status="completed",
+                    parent_id=latest.id,
+                    domain="dealer.example",
+                    metrics=_metrics(9, failures=2),
+                ),
+                models.ScrapeJob(source="shard", status="failed", parent_id=latest.id, domain="blocked.example"),
+            ]
+        )
+        db.commit()
+        latest_id = latest.id
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def test_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = test_db
+    app.dependency_overrides[require_auth] = lambda: True
+    with TestClient(app) as client:
+        client.latest_id = latest_id
+        yield client
+    app.dependency_overrides.clear()
+
+
+def test_jobs_list_sweeps_newest_first(client):
+    response = client.get("/admin/jobs")
+    assert response.status_code == 200
+    jobs = response.json()
+
+    assert [job["id"] for job in jobs] == [client.latest_id, client.latest_id - 1]
+    assert jobs[0]["status"] == "failed"
+    assert jobs[0]["blocked_domains"] == ["https://blocked.example/vdp"]
+    assert (jobs[0]["metrics"]["pages"], jobs[0]["metrics"]["unchanged"]) == (9, 1)
+    assert jobs[0]["metrics"]["domains"]["dealer.example"]["failures"] == 2
+
+    assert len(client.get("/admin/jobs", params={"limit": 1}).json()) == 1
+    assert client.get("/admin/jobs", params={"limit": 0}).status_code == 422
+
+
+def test_job_shards_break_a_sweep_down_by_domain(client):
+    shards = client.get(f"/admin/jobs/{client.latest_id}/shards").json()
+    assert [(shard["parent_id"], shard["domain"], shard["status"]) for shard in shards] == [
+        (client.latest_id, "dealer.example", "completed"),
+        (client.latest_id, "blocked.example", "failed"),
+    ]
+    assert shards[0]["metrics"]["domains"]["dealer.example"]["requests"] == 9
+    assert shards[1]["metrics"] is None
+
+    assert client.get(f"/admin/jobs/{client.latest_id - 1}/shards").json() == []
@@ -0,0 +1,34 @@
+from app.parsing import text_from_html, extract_miles, extract_prices, extract_vin
+from benchmarks.corpus import build_page
+from benchmarks.parsing import compare, incomparable
+
+
+def test_synthetic_pages_keep_listing_fields():
+    for index in range(5):
+        page = build_page(index, min_kb=50, max_kb=80)
+        text = text_from_html(page.html)
+        prices = extract_prices(text)
+
+        assert len(page.html) >= 50 * 1024
+        assert extract_vin(text) == page.vin
+        assert extract_miles(text) == page.miles
+        assert (max(prices), min(prices)) == (page.msrp, page.advertised_price)
+        assert build_page(index, min_kb=50, max_kb=80).html == page.html
+
+
+def test_compare_flags_slowdowns_and_memory_growth():
+    baseline = {"results": {"extractors": {"pages_per_s": 1000.0, "peak_kb": 50.0}}}
+    steady = {"results": {"extractors": {"pages_per_s": 900.0, "peak_kb": 55.0}}}
+    slower = {"results": {"extractors": {"pages_per_s": 600.0, "peak_kb": 80.0}}}
+
+    assert compare(steady, baseline, 0.25) == []
+    assert len(compare(slower, baseline, 0.25)) == 2
+
+
+def test_baselines_from_another_corpus_or_machine_are_not_compared():
+    meta = {"seed": 0, "min_kb": 150, "max_kb": 600, "machine": "x86_64"}
+    current = {"meta": meta}
+
+    assert incomparable(current, {"meta": dict(meta)}) is None
+    assert "corpus" in incomparable(current, {"meta": {**meta, "seed": 1}})
+    assert "arm64" in incomparable(current, {"meta": {**meta, "machine": "arm64"}})
@@ -0,0 +1,95 @@
+import fakeredis
+import fakeredis.aioredis
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from app import cache
+
+
+class Page(BaseModel):
+    build: int
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(cache, "redis_conn", fakeredis.aioredis.FakeRedis(server=server))
+    monkeypatch.setattr(cache.SyncRedis, "from_url", lambda url: fakeredis.FakeRedis(server=server))
+    return server
+
+
+@pytest.fixture
+def client(server):
+    """An app whose /pages counts how often the cache had to build the response."""
+    app = FastAPI()
+    builds = []
+
+    @app.get("/pages")
+    async def pages(request: Request):
+        async def build() -> Page:
+            builds.append(request.url.query)
+            return Page(build=len(builds))
+
+        return await cache.cached_response(request, build)
+
+    with TestClient(app) as client:
+        client.builds = builds
+        yield client
+
+
+def test_request_key_sorts_params_and_applies_overrides():
+    request = Request({"type": "http", "path": "/rankings", "query_string": b"weights=b&limit=5&a=1", "headers": []})
+
+    assert cache.request_key(request) == "/rankings?a=1&limit=5&weights=b"
+    assert cache.request_key(request, weights="canonical") == "/rankings?a=1&limit=5&weights=canonical"
+
+
+def test_repeat_requests_are_served_from_redis(client, server):
+    first = client.get("/pages?b=2&a=1")
+    reordered = client.get("/pages?a=1&b=2")
+    other = client.get("/pages?a=2")
+
+    assert first.json() == reordered.json() == {"build": 1}
+    assert other.json() == {"build": 2}
+    assert first.headers["etag"] == reordered.headers["etag"]
+    assert first.headers["etag"].startswith('"0-')
+    assert first.headers["cache-control"] == "no-cache"
+    assert fakeredis.FakeRedis(server=server).hget("response:0:/pages?a=1&b=2", "body") == first.content
+
+
+def test_matching_if_none_match_gets_304(client):
+    etag = client.get("/pages").headers["etag"]
+
+    revalidated = client.get("/pages", headers={"If-None-Match": f'"stale", {etag}'})
+    changed = client.get("/pages", headers={"If-None-Match": '"stale"'})
+
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+    assert changed.status_code == 200
+    assert client.builds == [""]
+
+
+def test_generation_bump_rebuilds_with_a_new_etag(client):
+    before = client.get("/pages")
+    cache.invalidate()
+    after = client.get("/pages", headers={"If-None-Match": before.headers["etag"]})
+
+    assert after.status_code == 200
+    assert after.json() == {"build": 2}
+    assert after.headers["etag"].startswith('"1-')
+    assert client.get("/pages").json() == {"build": 2}
+
+
+def test_redis_down_builds_every_response(client, server):
+    server.connected = False
+
+    first = client.get("/pages")
+    second = client.get("/pages")
+
+    assert first.json() == {"build": 1}
+    assert second.json() == {"build": 2}
+    assert first.headers["etag"].startswith('"0-')
+    assert second.headers["etag"] != first.headers["etag"]
+    cache.invalidate()  # logs instead of raising
@@ -2,7 +2,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.db import Base
 from app import models
-from app.scoring import compute_value_score
+from app.rescore import rescore
+from app.scoring import SCORING_VERSION, compute_value_score, compute_value_scores, stored_value_score
 from app.playbook import build_playbook
 
 
@@ -31,3 +32,56 @@ def test_end_to_end_insert_and_score():
 
     assert score["score"] > 0
     assert playbook["target_selling_price"] > 0
+
+
+def test_rescore_stores_current_scores():
+    engine = create_engine("sqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+
+    db = SessionLocal()
+    for index, price in enumerate([102000, 111000, None]):
+        db.add(
+            models.Listing(
+                listing_id=f"listing{index}",
+                source="dealer_site",
+                dealer_vdp_url=f"https://example.com/vdp/{index}",
+                model="BMW i7",
+                trim="xDrive60",
+                msrp=120000,
+                advertised_price=price,
+                miles=4200,
+                scoring_version=SCORING_VERSION if index == 1 else None,
+            )
+        )
+    db.commit()
+
+    assert rescore(db, batch_size=2) == 2
+    assert rescore(db) == 0
+    for saved in db.query(models.Listing).filter(models.Listing.listing_id != "listing1"):
+        expected = compute_value_score(saved.__dict__)
+        assert saved.scoring_version == SCORING_VERSION
+        assert stored_value_score(saved.__dict__) == expected
+        assert saved.score == expected["score"]
+
+
+def test_batch_scores_match_scalar_scores():
+    listings = [
+        {},
+        {"msrp": 120000, "advertised_price": 102000, "miles": 4200, "trim": "xDrive60"},
+        {"msrp": 145250, "advertised_price": 150000, "miles": 15001, "trim": "M70"},
+        {"msrp": 0, "advertised_price": 99999.5, "miles": 10000, "trim": "unknown"},
+        {"msrp": 105000, "miles": 5001, "trim": "eDrive50", "incentives": [{"amount": 2500}]},
+        {
+            "msrp": 119995.5,
+            "advertised_price": 111111,
+            "miles": 15000,
+            "incentives": [{"amount": 1234.5, "stackable": True}, {"amount": 9000}],
+            "lease_terms": {"payment": 1999, "due_at_signing": 5000},
+        },
+        {"incentives": [], "lease_terms": {"payment": 1499, "due_at_signing": None}},
+    ]
+    for weights in [None, {"lease_quality": 0.7, "discount_percent": 0.3}]:
+        assert compute_value_scores(listings, weights) == [
+            compute_value_score(listing, weights) for listing in listings
+        ]
@@ -0,0 +1,173 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.db import Base
+from app import models, ranking
+from app.cohorts import rebuild_cohorts
+from app.main import listing_comps, listing_page, listing_ranking
+from app.rescore import rescore
+from app.scoring import compute_value_score
+
+
+def _query(db, **params):
+    return listing_page(db, **params)
+
+
+def with_listings(test):
+    """Run an async test against a fresh in-memory database seeded with 11 active listings in one cohort."""
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            seen = datetime(2024, 11, 1)
+            for index in range(12):
+                db.add(
+                    models.Listing(
+                        listing_id=f"listing{index}",
+                        source="dealer_site",
+                        dealer_vdp_url=f"https://example.com/vdp/{index}",
+                        dealer_state="GA" if index % 2 else "FL",
+                        model="BMW i7",
+                        trim="xDrive60",
+                        msrp=120000,
+                        advertised_price=120000 - 1000 * (index % 6),
+                        miles=1000 * index,
+                        date_last_seen=seen + timedelta(hours=index),
+                        listing_status="merged" if index == 11 else "active",
+                    )
+                )
+            await db.commit()
+            await db.run_sync(rescore)
+            await db.run_sync(rebuild_cohorts)
+            await test(db)
+        await engine.dispose()
+
+    return run
+
+
+@pytest.mark.parametrize("sort", ["score", "discount", "recent"])
+def test_cursor_pages_cover_every_active_listing_once(sort):
+    async def check(db):
+        seen, cursor = [], None
+        while True:
+            page = await _query(db, sort=sort, limit=4, cursor=cursor)
+            seen.extend(item.listing_id for item in page.items)
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+
+        everything = (await _query(db, sort=sort)).items
+        assert seen == [item.listing_id for item in everything]
+        assert sorted(seen) == sorted(f"listing{index}" for index in range(11))
+        if sort == "recent":
+            assert [item.date_last_seen for item in everything] == sorted(
+                (item.date_last_seen for item in everything), reverse=True
+            )
+        else:
+            values = [getattr(item.score, "score" if sort == "score" else "discount_percent") for item in everything]
+            assert values == sorted(values, reverse=True)
+
+    asyncio.run(with_listings(check)())
+
+
+def test_filters_and_bad_cursor():
+    async def check(db):
+        page = await _query(db, state=["ga"], max_miles=7000, min_discount=2)
+        assert page.items
+        for item in page.items:
+            assert item.dealer_state == "GA"
+            assert item.miles <= 7000
+            assert item.score.discount_percent >= 2
+
+        cursor = (await _query(db, sort="score", limit=2)).next_cursor
+        with pytest.raises(HTTPException):
+            await _query(db, sort="recent", cursor=cursor)
+        with pytest.raises(HTTPException):
+            await _query(db, cursor="not-a-cursor")
+
+    asyncio.run(with_listings(check)())
+
+
+def test_comps_rank_against_the_whole_cohort():
+    async def check(db):
+        comps = await listing_comps(db, "listing5")
+        assert comps.cohort_size == 11
+        assert comps.percentile == 100
+        assert comps.median_discount_percent == 1.67
+        assert len(comps.comps) == 5
+        assert "listing5" not in {comp.listing_id for comp in comps.comps}
+        assert "listing11" not in {comp.listing_id for comp in comps.comps}
+
+        assert (await listing_comps(db, "listing0")).percentile == round(2 / 11 * 100, 2)
+
+    asyncio.run(with_listings(check)())
+
+
+def test_ranking_matches_full_sort_under_custom_weights():
+    async def check(db):
+        weights = ranking.parse_weights("miles:0.8, discount_percent:0.2, incentives:0")
+        assert weights == {"discount_percent": 0.2, "miles": 0.8}
+        result = await listing_ranking(db, weights, k=3, state=["GA"])
+
+        active = await _query(db, state=["GA"])
+        expected = sorted((compute_value_score(item.model_dump(), weights)["score"] for item in active.items))
+        assert [item.score.score for item in result.items] == expected[::-1][:3]
+        assert {item.dealer_state for item in result.items} == {"GA"}
+
+    asyncio.run(with_listings(check)())
+
+    for spec in ["unknown:1", "miles:-1", "miles:abc", "miles:0"]:
+        with pytest.raises(ValueError):
+            ranking.parse_weights(spec)
+
+
+def test_stale_scores_are_not_used_for_ordering_or_filtering():
+    async def check(db):
+        # listing0 has no discount, but was stored under an older scoring version with a winning score.
+        stale = await db.scalar(select(models.Listing).where(models.Listing.listing_id == "listing0"))
+        stale.score, stale.discount_percent, stale.scoring_version = 99.0, 50.0, "old"
+        await db.commit()
+
+        for sort in ["score", "discount"]:
+            assert "listing0" not in {item.listing_id for item in (await _query(db, sort=sort)).items}
+        recent = {item.listing_id: item for item in (await _query(db, sort="recent")).items}
+        assert recent["listing0"].score.discount_percent == 0
+        assert "listing0" not in {item.listing_id for item in (await _query(db, sort="recent", min_discount=1)).items}
+
+        # listing5 is 5000 off 120000 (4.17%); stale rows fall back to price and MSRP.
+        stale = await db.scalar(select(models.Listing).where(models.Listing.listing_id == "listing5"))
+        stale.discount_percent, stale.scoring_version = 0.0, None
+        await db.commit()
+        found = {item.listing_id for item in (await _query(db, sort="recent", min_discount=4)).items}
+        assert found == {"listing5"}
+
+        await db.run_sync(rescore)
+        assert "listing0" in {item.listing_id for item in (await _query(db, sort="score")).items}
+
+    asyncio.run(with_listings(check)())
+
+
+def test_ranking_scores_stale_rows_from_their_fields():
+    async def check(db):
+        weights = ranking.parse_weights("discount_percent:1")
+        # listing5 has the biggest discount, but its stored components predate SCORING_VERSION.
+        stale = await db.scalar(select(models.Listing).where(models.Listing.listing_id == "listing5"))
+        stale.value_components, stale.discount_percent, stale.scoring_version = {}, 0.0, None
+        await db.commit()
+
+        result = await listing_ranking(db, weights, k=2)
+        assert [item.listing_id for item in result.items] == ["listing5", "listing4"]
+        assert result.items[0].score.score == round(compute_value_score(stale.__dict__, weights)["score"], 4)
+        assert result.items[0].score.discount_percent == 4.17
+        assert result.items[0].score.value_components["discount_percent"] > 0
+
+        filtered = await listing_ranking(db, weights, k=20, min_discount=4)
+        assert [item.listing_id for item in filtered.items] == ["listing5"]
+
+    asyncio.run(with_listings(check)())
@@ -0,0 +1,21 @@
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+
+BACKEND = Path(__file__).parents[1]
+
+
+def test_migrations_upgrade_and_downgrade_on_sqlite(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.sqlite3'}"
+    config = Config(str(BACKEND / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND / "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+
+    command.upgrade(config, "head")
+    engine = create_engine(url)
+    assert [key["referred_table"] for key in inspect(engine).get_foreign_keys("scrape_jobs")] == ["scrape_jobs"]
+
+    command.downgrade(config, "0001")
+    assert "parent_id" not in {column["name"] for column in inspect(engine).get_columns("scrape_jobs")}
+    engine.dispose()
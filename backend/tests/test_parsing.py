@@ -1,5 +1,15 @@
 from pathlib import Path
-from app.parsing import text_from_html, detect_loaner, extract_miles, extract_prices, extract_vin
+from app.parsing import (
+    LOANER_KEYWORDS,
+    FieldScan,
+    detect_loaner,
+    extract_miles,
+    extract_prices,
+    extract_stock_no,
+    extract_vin,
+    scan_fields,
+    text_from_html,
+)
 
 FIXTURES = [
     "dealer1.html",
@@ -27,3 +37,37 @@ def test_parsing_fixtures():
             assert vin is None
         else:
             assert vin is None or len(vin) == 17
+
+
+def test_extract_stock_no():
+    text = text_from_html((Path(__file__).parent / "fixtures" / "dealer2.html").read_text())
+    assert extract_stock_no(text) == "ED50-22"
+    assert extract_stock_no("Stock Number: bx-4471 | VIN pending") == "BX-4471"
+    assert extract_stock_no("In stock now, call today") is None
+
+
+def test_scan_fields_matches_individual_extractors():
+    base = Path(__file__).parent / "fixtures"
+    for fixture in FIXTURES:
+        text = text_from_html((base / fixture).read_text())
+        scan = scan_fields(text)
+
+        assert scan.keywords == [kw for kw in LOANER_KEYWORDS if kw in text.lower()]
+        assert scan.vin == extract_vin(text)
+        assert scan.miles == extract_miles(text)
+        assert scan.prices == extract_prices(text)
+        assert scan.stock_no == extract_stock_no(text)
+
+
+def test_scan_fields_finds_overlapping_fields():
+    text = "SERVICE LOANER WBA12345678901234 stock no. ed50-22, now $99,000 miles $120,000 2,500 mi"
+
+    assert scan_fields(text) == FieldScan(
+        keywords=["loaner", "service loaner"],
+        vin="WBA12345678901234",
+        miles=99000,
+        stock_no="ED50-22",
+        prices=[99000.0, 120000.0],
+    )
+    assert scan_fields(text).is_loaner
+    assert detect_loaner("No keywords here") == (False, [])
@@ -1,6 +1,6 @@
 "use client";
 
-import { useEffect, useMemo, useState } from "react";
+import { useCallback, useEffect, useMemo, useState } from "react";
 import DealsTable from "./DealsTable";
 import DetailDrawer from "./DetailDrawer";
 
@@ -17,6 +17,14 @@ const fallbackDeals = [
   },
 ];
 
+const sortOptions = [
+  { label: "Value score", value: "score" },
+  { label: "Discount %", value: "discount" },
+  { label: "Recently seen", value: "recent" },
+];
+
+const PAGE_SIZE = 25;
+
 const modelOptions = [
   { label: "BMW i7", value: "BMW i7" },
   { label: "BMW i5", value: "BMW i5" },
@@ -28,7 +36,11 @@ const modelOptions = [
 
 export default function DashboardClient() {
   const [model, setModel] = useState("BMW i7");
+  const [sort, setSort] = useState("score");
+  const [maxMiles, setMaxMiles] = useState("");
+  const [minDiscount, setMinDiscount] = useState("");
   const [deals, setDeals] = useState(fallbackDeals);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
 
   const apiBase = useMemo(
@@ -36,24 +48,37 @@ export default function DashboardClient() {
     []
   );
 
+  const listingsUrl = useCallback(
+    (cursor?: string | null) => {
+      const params = new URLSearchParams({ model, sort, limit: String(PAGE_SIZE) });
+      if (maxMiles) params.set("max_miles", maxMiles);
+      if (minDiscount) params.set("min_discount", minDiscount);
+      if (cursor) params.set("cursor", cursor);
+      return `${apiBase}/listings?${params.toString()}`;
+    },
+    [apiBase, model, sort, maxMiles, minDiscount]
+  );
+
   useEffect(() => {
     let ignore = false;
     const fetchDeals = async () => {
       setLoading(true);
       try {
-        const response = await fetch(`${apiBase}/listings?model=${encodeURIComponent(model)}`, {
-          cache: "no-store",
+        const response = await fetch(listingsUrl(), {
+          cache: "no-cache",
         });
         if (!response.ok) {
           throw new Error("Bad response");
         }
         const data = await response.json();
         if (!ignore) {
-          setDeals(data.length ? data : fallbackDeals);
+          setDeals(data.items.length ? data.items : fallbackDeals);
+          setNextCursor(data.next_cursor);
         }
       } catch {
         if (!ignore) {
           setDeals(fallbackDeals);
+          setNextCursor(null);
         }
       } finally {
         if (!ignore) {
@@ -67,7 +92,25 @@ export default function DashboardClient() {
     return () => {
       ignore = true;
     };
-  }, [apiBase, model]);
+  }, [listingsUrl]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoading(true);
+    try {
+      const response = await fetch(listingsUrl(nextCursor), { cache: "no-cache" });
+      if (!response.ok) {
+        throw new Error("Bad response");
+      }
+      const data = await response.json();
+      setDeals((current) => [...current, ...data.items]);
+      setNextCursor(data.next_cursor);
+    } catch {
+      setNextCursor(null);
+    } finally {
+      setLoading(false);
+    }
+  };
 
   return (
     <main className="min-h-screen px-8 py-10">
@@ -94,11 +137,57 @@ export default function DashboardClient() {
               ))}
             </select>
           </label>
+          <label className="flex items-center gap-2 text-sm text-slate-200">
+            Sort:
+            <select
+              value={sort}
+              onChange={(event) => setSort(event.target.value)}
+              className="rounded border border-slate-700 bg-slate-900 px-2 py-1 text-sm text-slate-100"
+            >
+              {sortOptions.map((option) => (
+                <option key={option.value} value={option.value}>
+                  {option.label}
+                </option>
+              ))}
+            </select>
+          </label>
+          <label className="flex items-center gap-2 text-sm text-slate-200">
+            Max miles:
+            <input
+              type="number"
+              min={0}
+              value={maxMiles}
+              onChange={(event) => setMaxMiles(event.target.value)}
+              className="w-24 rounded border border-slate-700 bg-slate-900 px-2 py-1 text-sm text-slate-100"
+            />
+          </label>
+          <label className="flex items-center gap-2 text-sm text-slate-200">
+            Min discount %:
+            <input
+              type="number"
+              min={0}
+              value={minDiscount}
+              onChange={(event) => setMinDiscount(event.target.value)}
+              className="w-20 rounded border border-slate-700 bg-slate-900 px-2 py-1 text-sm text-slate-100"
+            />
+          </label>
           {loading && <span className="text-emerald-300">Loading deals…</span>}
         </div>
       </header>
 
-      <DealsTable deals={deals.slice(0, 25)} />
+      <DealsTable deals={deals} />
+      {nextCursor && (
+        <div className="mt-4 flex justify-center">
+          <button
+            type="button"
+            onClick={loadMore}
+            disabled={loading}
+            className="rounded border border-slate-700 px-4 py-2 text-sm text-slate-200 disabled:opacity-50"
+          >
+            Load more deals
+          </button>
+        </div>
+      )}
 
       <section className="mt-10 grid gap-6 lg:grid-cols-3">
         <div className="rounded-xl border border-slate-800 bg-slate-900/60 p-6">
@@ -25,9 +25,9 @@ export default function DealsTable({ deals }: { deals: Deal[] }) {
   return (
     <div className="rounded-xl border border-slate-800 bg-slate-900/60">
       <div className="px-6 py-4">
-        <h2 className="text-xl font-semibold">Top 25 Negotiation Setups</h2>
+        <h2 className="text-xl font-semibold">Top Negotiation Setups</h2>
         <p className="text-sm text-slate-400">
-          Sorted by value score, discount %, and loaner mileage.
+          {deals.length} deals loaded. Sort by value score, discount %, or recency above.
         </p>
       </div>
       <div className="overflow-x-auto">
@@ -1,11 +1,12 @@
+import asyncio
 from datetime import datetime
-from bs4 import BeautifulSoup
 from urllib.parse import quote_plus
 from .base import SourceAdapter
-from ..parsing import text_from_html, extract_miles, extract_prices, extract_vin, detect_loaner, hash_listing_id
+from ..parsing import parse_html, extract_listing_fields, find_dealer_link, hash_listing_id
 from ..confidence import compute_confidence
 from ..robots import allowed
-from ..http import get
+from ..http import FetchEngine, get
+from ..httpcache import fetch_page
 
 
 class AggregatorAdapter(SourceAdapter):
@@ -24,16 +25,18 @@ class AggregatorAdapter(SourceAdapter):
         response.raise_for_status()
         return {"url": url, "html": response.text, "scraped_at": datetime.utcnow()}
 
+    async def scrape_listing_async(self, url: str, engine: FetchEngine) -> dict:
+        if not await asyncio.to_thread(allowed, url):
+            return {"blocked": True, "url": url}
+        return await fetch_page(url, engine, timeout=15)
+
     def normalize(self, raw: dict) -> dict:
         if raw.get("blocked"):
             return {"blocked": True, "url": raw["url"]}
-        soup = BeautifulSoup(raw["html"], "html.parser")
-        dealer_link = soup.find("a", string=lambda text: text and "dealer" in text.lower())
-        dealer_url = dealer_link["href"] if dealer_link else None
-        text = text_from_html(raw["html"])
-        is_loaner, keywords = detect_loaner(text)
-        prices = extract_prices(text)
-        vin = extract_vin(text)
+        page = parse_html(raw["html"])
+        fields = extract_listing_fields(page)
+        dealer_url = find_dealer_link(page)
+        vin = fields["vin"]
         if not dealer_url and vin:
             query = quote_plus(f"{vin} dealer vehicle detail page")
             dealer_url = f"https://www.bing.com/search?q={query}"
@@ -44,12 +47,7 @@ class AggregatorAdapter(SourceAdapter):
             "dealer_vdp_url": dealer_url,
             "aggregator_url": raw["url"],
             "model": "BMW i7",
-            "is_loaner": is_loaner,
-            "listing_keywords": keywords,
-            "miles": extract_miles(text),
-            "vin": vin,
-            "msrp": max(prices) if prices else None,
-            "advertised_price": min(prices) if prices else None,
+            **fields,
             "date_last_seen": raw["scraped_at"],
             "last_scraped_at": raw["scraped_at"],
         }
@@ -1,17 +1,32 @@
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterable
+from ..http import FetchEngine
+
+_EXHAUSTED = object()
 
 
 class SourceAdapter(ABC):
     source_name: str
 
     @abstractmethod
-    def discover(self) -> list[str]:
-        """Return list of listing URLs to scrape."""
+    def discover(self) -> Iterable[str]:
+        """Return or yield listing URLs to scrape."""
+
+    async def discover_async(self) -> AsyncIterator[str]:
+        """Yield listing URLs as discovery produces them, without blocking the event loop."""
+        urls = iter(self.discover())
+        while (url := await asyncio.to_thread(next, urls, _EXHAUSTED)) is not _EXHAUSTED:
+            yield url
 
     @abstractmethod
     def scrape_listing(self, url: str) -> dict:
         """Fetch listing data from URL."""
 
+    async def scrape_listing_async(self, url: str, engine: FetchEngine) -> dict:
+        """Fetch listing data from URL through the shared async fetch engine."""
+        return await asyncio.to_thread(self.scrape_listing, url)
+
     @abstractmethod
     def normalize(self, raw: dict) -> dict:
         """Normalize raw scrape data to listing schema."""
@@ -1,9 +1,11 @@
+import asyncio
 from datetime import datetime
 from .base import SourceAdapter
-from ..parsing import text_from_html, extract_miles, extract_prices, extract_vin, detect_loaner, hash_listing_id
+from ..parsing import parse_html, extract_listing_fields, hash_listing_id
 from ..confidence import compute_confidence
 from ..robots import allowed
-from ..http import get
+from ..http import FetchEngine, get
+from ..httpcache import fetch_page
 
 
 class DealerSiteAdapter(SourceAdapter):
@@ -22,25 +24,21 @@ class DealerSiteAdapter(SourceAdapter):
         response.raise_for_status()
         return {"url": url, "html": response.text, "scraped_at": datetime.utcnow()}
 
+    async def scrape_listing_async(self, url: str, engine: FetchEngine) -> dict:
+        if not await asyncio.to_thread(allowed, url):
+            return {"blocked": True, "url": url}
+        return await fetch_page(url, engine, timeout=15)
+
     def normalize(self, raw: dict) -> dict:
         if raw.get("blocked"):
             return {"blocked": True, "url": raw["url"]}
-        text = text_from_html(raw["html"])
-        is_loaner, keywords = detect_loaner(text)
-        prices = extract_prices(text)
-        msrp = max(prices) if prices else None
-        advertised_price = min(prices) if prices else None
+        fields = extract_listing_fields(parse_html(raw["html"]))
         normalized = {
             "listing_id": hash_listing_id(raw["url"]),
             "source": self.source_name,
             "dealer_vdp_url": raw["url"],
             "model": "BMW i7",
-            "is_loaner": is_loaner,
-            "listing_keywords": keywords,
-            "miles": extract_miles(text),
-            "vin": extract_vin(text),
-            "msrp": msrp,
-            "advertised_price": advertised_price,
+            **fields,
             "date_last_seen": raw["scraped_at"],
             "last_scraped_at": raw["scraped_at"],
         }
@@ -1,9 +1,16 @@
+import hashlib
+import json
+from collections.abc import Iterator
 from datetime import datetime
 from bs4 import BeautifulSoup
+from loguru import logger
+from redis import RedisError
 from urllib.parse import quote_plus
 from .base import SourceAdapter
 from ..parsing import hash_listing_id
 from ..confidence import compute_confidence
+from ..config import settings
+from ..frontier import redis_conn
 from ..http import get
 from ..robots import allowed
 
@@ -14,19 +21,32 @@ class SearchAdapter(SourceAdapter):
     def __init__(self, queries: list[str]):
         self.queries = queries
 
-    def discover(self) -> list[str]:
-        results: list[str] = []
+    def discover(self) -> Iterator[str]:
         for query in self.queries:
-            url = f"https://www.bing.com/search?q={quote_plus(query)}"
-            if not allowed(url):
-                continue
-            response = get(url, timeout=15)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            for link in soup.select("li.b_algo h2 a"):
-                href = link.get("href")
-                if href and "i7" in href.lower():
-                    results.append(href)
+            yield from self._results(query)
+
+    def _results(self, query: str) -> list[str]:
+        key = f"search:{hashlib.sha256(query.encode('utf-8')).hexdigest()[:32]}"
+        try:
+            cached = redis_conn.get(key)
+        except RedisError as exc:
+            logger.warning("Search cache read failed for {!r}: {}", query, exc)
+            cached = None
+        if cached:
+            return json.loads(cached)
+
+        url = f"https://www.bing.com/search?q={quote_plus(query)}"
+        if not allowed(url):
+            return []
+        response = get(url, timeout=15)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, "html.parser")
+        hrefs = [link.get("href") for link in soup.select("li.b_algo h2 a")]
+        results = list(dict.fromkeys(href for href in hrefs if href and "i7" in href.lower()))
+        try:
+            redis_conn.set(key, json.dumps(results), ex=settings.search_cache_ttl_s)
+        except RedisError as exc:
+            logger.warning("Search cache write failed for {!r}: {}", query, exc)
         return results
 
     def scrape_listing(self, url: str) -> dict:
@@ -0,0 +1,86 @@
+from bisect import bisect_left, bisect_right
+from sqlalchemy.orm import Session
+from .models import Alert, Listing
+
+_UNBOUNDED = float("inf")
+
+
+def listing_discount_percent(listing: Listing) -> float | None:
+    if not listing.msrp or not listing.advertised_price:
+        return None
+    return (listing.msrp - listing.advertised_price) / listing.msrp * 100
+
+
+def meets_alert(alert: Alert, listing: Listing) -> bool:
+    discount = listing_discount_percent(listing)
+    if alert.min_discount_percent and discount is not None:
+        if discount < alert.min_discount_percent:
+            return False
+    if alert.max_miles and listing.miles and listing.miles > alert.max_miles:
+        return False
+    if alert.max_price and listing.advertised_price and listing.advertised_price > alert.max_price:
+        return False
+    if alert.states and listing.dealer_state and listing.dealer_state not in alert.states:
+        return False
+    return True
+
+
+def _min_discount_key(alert: Alert) -> float:
+    return alert.min_discount_percent or -_UNBOUNDED
+
+
+def _max_miles_key(alert: Alert) -> float:
+    return alert.max_miles or _UNBOUNDED
+
+
+def _max_price_key(alert: Alert) -> float:
+    return alert.max_price or _UNBOUNDED
+
+
+class _AlertBucket:
+    def __init__(self, alerts: list[Alert]):
+        self.by_discount = sorted(alerts, key=_min_discount_key)
+        self.discount_keys = [_min_discount_key(alert) for alert in self.by_discount]
+        self.by_miles = sorted(alerts, key=_max_miles_key)
+        self.miles_keys = [_max_miles_key(alert) for alert in self.by_miles]
+        self.by_price = sorted(alerts, key=_max_price_key)
+        self.price_keys = [_max_price_key(alert) for alert in self.by_price]
+
+    def candidates(self, listing: Listing) -> list[Alert]:
+        options = [self.by_discount]
+        discount = listing_discount_percent(listing)
+        if discount is not None:
+            options.append(self.by_discount[: bisect_right(self.discount_keys, discount)])
+        if listing.miles:
+            options.append(self.by_miles[bisect_left(self.miles_keys, listing.miles) :])
+        if listing.advertised_price:
+            options.append(self.by_price[bisect_left(self.price_keys, listing.advertised_price) :])
+        return min(options, key=len)
+
+
+class AlertIndex:
+    """Alerts bucketed by state and sorted by threshold so listings only check plausible matches."""
+
+    def __init__(self, alerts: list[Alert]):
+        unrestricted = [alert for alert in alerts if not alert.states]
+        by_state: dict[str, list[Alert]] = {}
+        for alert in alerts:
+            for state in alert.states or []:
+                by_state.setdefault(state, list(unrestricted)).append(alert)
+        self._all = _AlertBucket(alerts)
+        self._unrestricted = _AlertBucket(unrestricted)
+        self._by_state = {state: _AlertBucket(bucket) for state, bucket in by_state.items()}
+
+    @classmethod
+    def load(cls, db: Session) -> "AlertIndex":
+        alerts = db.query(Alert).all()
+        for alert in alerts:
+            db.expunge(alert)
+        return cls(alerts)
+
+    def matches(self, listing: Listing) -> list[Alert]:
+        if listing.dealer_state:
+            bucket = self._by_state.get(listing.dealer_state, self._unrestricted)
+        else:
+            bucket = self._all
+        return [alert for alert in bucket.candidates(listing) if meets_alert(alert, listing)]
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+import zstandard
+from .config import settings
+
+
+@dataclass
+class ArchivedPage:
+    url: str
+    source: str
+    scraped_at: datetime
+    content_hash: str
+
+
+class PageArchive:
+    """Content-addressed, zstd-compressed store of raw scraped HTML with a per-fetch index."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.root / "index.sqlite3", timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "id INTEGER PRIMARY KEY, url TEXT NOT NULL, source TEXT NOT NULL, "
+                "scraped_at TEXT NOT NULL, content_hash TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_url_scraped ON pages (url, scraped_at)")
+        return self._conn
+
+    def _blob_path(self, content_hash: str) -> Path:
+        return self.root / "blobs" / content_hash[:2] / f"{content_hash}.zst"
+
+    def store(self, url: str, source: str, html: str, scraped_at: datetime) -> str:
+        body = html.encode("utf-8")
+        content_hash = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(content_hash)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # A temp name of its own, so workers archiving the same page at once never share a partial file.
+            partial = tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name, suffix=".tmp", delete=False)
+            try:
+                with partial:
+                    partial.write(zstandard.ZstdCompressor().compress(body))
+                os.replace(partial.name, path)
+            except BaseException:
+                os.unlink(partial.name)
+                raise
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO pages (url, source, scraped_at, content_hash) VALUES (?, ?, ?, ?)",
+                (url, source, scraped_at.isoformat(), content_hash),
+            )
+            conn.commit()
+        return content_hash
+
+    def load(self, content_hash: str) -> str:
+        return zstandard.ZstdDecompressor().decompress(self._blob_path(content_hash).read_bytes()).decode("utf-8")
+
+    def pages(
+        self,
+        source: str | None = None,
+        since: datetime | None = None,
+        latest_only: bool = True,
+    ) -> Iterator[ArchivedPage]:
+        clauses, params = [], []
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        if since:
+            clauses.append("scraped_at >= ?")
+            params.append(since.isoformat())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT url, source, scraped_at, content_hash FROM pages {where} ORDER BY url, scraped_at"
+        if latest_only:
+            query = (
+                "SELECT url, source, MAX(scraped_at), content_hash "
+                f"FROM pages {where} GROUP BY url ORDER BY url"
+            )
+        with self._lock:
+            rows = self._connection().execute(query, params).fetchall()
+        for url, page_source, scraped_at, content_hash in rows:
+            yield ArchivedPage(url, page_source, datetime.fromisoformat(scraped_at), content_hash)
+
+
+page_archive = PageArchive(settings.archive_dir)
@@ -0,0 +1,54 @@
+from datetime import datetime
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from .db import insert_for
+from .models import CohortStats, Listing
+
+# Mirrors backend/app/cohorts.py; comps compare listings of one trim within the same $10k of MSRP.
+MSRP_BUCKET = 10000
+
+
+def msrp_bucket(msrp: float | None) -> int | None:
+    return int(msrp // MSRP_BUCKET) if msrp else None
+
+
+def cohorts_of(db: Session, listing_ids: list[str]) -> set[tuple[str, int]]:
+    if not listing_ids:
+        return set()
+    rows = db.execute(select(Listing.trim, Listing.msrp).where(Listing.listing_id.in_(listing_ids)))
+    return {(trim, msrp_bucket(msrp)) for trim, msrp in rows if trim and msrp}
+
+
+def refresh_cohorts(db: Session, cohorts: set[tuple[str, int]]) -> None:
+    """Rebuild the sorted discount distribution of each cohort a write may have changed.
+
+    Cohorts are upserted in sorted order, so concurrent writers lock shared cohort rows in the same order.
+    """
+    insert = insert_for(db.get_bind().dialect.name)
+    now = datetime.utcnow()
+    for trim, bucket in sorted(cohorts):
+        discounts = list(
+            db.scalars(
+                select(Listing.discount_percent)
+                .where(
+                    Listing.listing_status == "active",
+                    Listing.trim == trim,
+                    Listing.msrp >= bucket * MSRP_BUCKET,
+                    Listing.msrp < (bucket + 1) * MSRP_BUCKET,
+                    Listing.discount_percent.is_not(None),
+                )
+                .order_by(Listing.discount_percent)
+            )
+        )
+        if not discounts:
+            db.execute(delete(CohortStats).where(CohortStats.trim == trim, CohortStats.msrp_bucket == bucket))
+            continue
+        stmt = insert(CohortStats).values(
+            trim=trim, msrp_bucket=bucket, listing_count=len(discounts), discounts=discounts, updated_at=now
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[CohortStats.trim, CohortStats.msrp_bucket],
+                set_={column: stmt.excluded[column] for column in ("listing_count", "discounts", "updated_at")},
+            )
+        )
@@ -1,6 +1,11 @@
+import os
+from pathlib import Path
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
+# Absolute, so the caches don't depend on the directory the worker was started from.
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "i7-scanner"
+
 
 class Settings(BaseSettings):
     database_url: str = Field(
@@ -10,6 +15,24 @@ class Settings(BaseSettings):
     redis_url: str = Field(default="redis://redis:6379/0", alias="REDIS_URL")
     request_rate_limit_s: float = Field(default=1.0, alias="REQUEST_RATE_LIMIT_S")
     global_concurrency: int = Field(default=4, alias="GLOBAL_CONCURRENCY")
+    http_pool_hosts: int = Field(default=64, alias="HTTP_POOL_HOSTS")
+    http_pool_maxsize: int = Field(default=4, alias="HTTP_POOL_MAXSIZE")
+    rate_limit_backend: str = Field(default="redis", alias="RATE_LIMIT_BACKEND")
+    robots_cache_ttl_s: int = Field(default=86400, alias="ROBOTS_CACHE_TTL_S")
+    robots_negative_ttl_s: int = Field(default=900, alias="ROBOTS_NEGATIVE_TTL_S")
+    pipeline_queue_size: int = Field(default=100, alias="PIPELINE_QUEUE_SIZE")
+    pipeline_fetch_workers: int = Field(default=32, alias="PIPELINE_FETCH_WORKERS")
+    parse_workers: int = Field(default_factory=lambda: max((os.cpu_count() or 1) - 1, 0), alias="PARSE_WORKERS")
+    http_cache_path: str = Field(default=str(CACHE_DIR / "http_cache.sqlite3"), alias="HTTP_CACHE_PATH")
+    recrawl_base_interval_s: int = Field(default=21600, alias="RECRAWL_BASE_INTERVAL_S")
+    recrawl_min_interval_s: int = Field(default=600, alias="RECRAWL_MIN_INTERVAL_S")
+    recrawl_max_interval_s: int = Field(default=604800, alias="RECRAWL_MAX_INTERVAL_S")
+    recrawl_sweep_budget: int = Field(default=2000, alias="RECRAWL_SWEEP_BUDGET")
+    archive_dir: str = Field(default=str(CACHE_DIR / "archive"), alias="ARCHIVE_DIR")
+    frontier_ttl_s: int = Field(default=86400, alias="FRONTIER_TTL_S")
+    search_cache_ttl_s: int = Field(default=3600, alias="SEARCH_CACHE_TTL_S")
+    upsert_batch_size: int = Field(default=500, alias="UPSERT_BATCH_SIZE")
+    shard_job_timeout_s: int = Field(default=600, alias="SHARD_JOB_TIMEOUT_S")
 
 
 settings = Settings()
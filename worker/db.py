@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from .config import settings
 
@@ -11,6 +12,14 @@ engine = create_engine(settings.database_url, pool_pre_ping=True)
 SessionLocal = sessionmaker(bind=engine)
 
 
+def insert_for(dialect_name: str):
+    if dialect_name == "postgresql":
+        return postgresql.insert
+    if dialect_name == "sqlite":
+        return sqlite.insert
+    raise ValueError(f"Bulk upsert is not supported for dialect {dialect_name!r}")
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,64 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from loguru import logger
+from redis import Redis, RedisError
+from .config import settings
+
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "dclid", "yclid", "mc_cid", "mc_eid", "_ga", "srsltid"}
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+redis_conn = Redis.from_url(settings.redis_url)
+
+
+def canonicalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if parts.port and str(parts.port) != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class UrlFrontier:
+    """Sweep-wide record of every canonical URL and its status, shared by all adapters and shards.
+
+    A URL is claimed once per sweep; later discoveries of the same URL (from another adapter,
+    a repeated search hit, or a tracking-parameter variant) are dropped before fetching. The
+    canonical form is only the key: callers keep fetching and storing the URL they discovered.
+    """
+
+    def __init__(self, sweep_id: int | str, redis: Redis | None = None):
+        self.key = f"frontier:{sweep_id}"
+        self._redis = redis if redis is not None else redis_conn
+        self._local: dict[str, str] = {}
+
+    def claim(self, url: str) -> bool:
+        canonical = canonicalize_url(url)
+        try:
+            claimed, _ = (
+                self._redis.pipeline()
+                .hsetnx(self.key, canonical, "queued")
+                .expire(self.key, settings.frontier_ttl_s)
+                .execute()
+            )
+            return bool(claimed)
+        except RedisError as exc:
+            logger.warning("Shared frontier unavailable, deduplicating locally: {}", exc)
+        if canonical in self._local:
+            return False
+        self._local[canonical] = "queued"
+        return True
+
+    def mark(self, url: str, status: str) -> None:
+        canonical = canonicalize_url(url)
+        try:
+            self._redis.hset(self.key, canonical, status)
+            return
+        except RedisError as exc:
+            logger.warning("Failed to record frontier status for {}: {}", url, exc)
+        self._local[canonical] = status
+
@@ -1,18 +1,43 @@
+import asyncio
 import time
 from urllib.parse import urlparse
 import requests
 from .config import settings
+from .ratelimit import limiter
+from .robots import crawl_delay
+from .session import session
 
-_last_request: dict[str, float] = {}
+
+def _spacing(url: str, rate_limit_s: float) -> float:
+    return max(rate_limit_s, crawl_delay(url) or 0)
 
 
 def get(url: str, **kwargs) -> requests.Response:
     domain = urlparse(url).netloc
-    now = time.time()
-    last = _last_request.get(domain, 0)
-    wait = settings.request_rate_limit_s - (now - last)
+    wait = limiter.reserve(domain, _spacing(url, settings.request_rate_limit_s))
     if wait > 0:
         time.sleep(wait)
-    response = requests.get(url, **kwargs)
-    _last_request[domain] = time.time()
-    return response
+    return session.get(url, **kwargs)
+
+
+class FetchEngine:
+    """Async fetcher: up to `concurrency` requests in flight, one at a time per domain."""
+
+    def __init__(self, concurrency: int | None = None, rate_limit_s: float | None = None):
+        self.concurrency = concurrency or settings.global_concurrency
+        self.rate_limit_s = settings.request_rate_limit_s if rate_limit_s is None else rate_limit_s
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._domain_locks: dict[str, asyncio.Lock] = {}
+
+    async def get(self, url: str, **kwargs) -> requests.Response:
+        domain = urlparse(url).netloc
+        lock = self._domain_locks.setdefault(domain, asyncio.Lock())
+        async with lock:
+            # crawl_delay may fetch robots.txt or hit Redis; keep that blocking I/O off the event loop.
+            spacing = await asyncio.to_thread(_spacing, url, self.rate_limit_s)
+            async with self._semaphore:
+                # Reserve only once a slot is free, so the reserved start is when the request actually goes out.
+                wait = await asyncio.to_thread(limiter.reserve, domain, spacing)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                return await asyncio.to_thread(session.get, url, **kwargs)
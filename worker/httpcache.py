@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from .config import settings
+from .http import FetchEngine
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    etag: str | None
+    last_modified: str | None
+    content_hash: str
+    listing_id: str | None = None
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """On-disk validators and content hashes for fetched pages, keyed by URL."""
+
+    def __init__(self, path: str):
+        self.path = Path(path).expanduser().resolve()
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT NOT NULL, "
+                "listing_id TEXT, updated_at TEXT NOT NULL)"
+            )
+        return self._conn
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT url, etag, last_modified, content_hash, listing_id FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def store(self, entries: list[CacheEntry]) -> None:
+        if not entries:
+            return
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (entry.url, entry.etag, entry.last_modified, entry.content_hash, entry.listing_id, now)
+                    for entry in entries
+                ],
+            )
+            conn.commit()
+
+
+http_cache = HttpCache(settings.http_cache_path)
+
+
+async def fetch_page(url: str, engine: FetchEngine, **kwargs) -> dict:
+    cached = await asyncio.to_thread(http_cache.lookup, url)
+    headers = cached.conditional_headers() if cached and cached.listing_id else {}
+    response = await engine.get(url, headers=headers, **kwargs)
+    scraped_at = datetime.utcnow()
+    unchanged = {"url": url, "unchanged": True, "scraped_at": scraped_at, "bytes": len(response.content)}
+    if response.status_code == 304 and headers:
+        return {**unchanged, "listing_id": cached.listing_id}
+    response.raise_for_status()
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    if cached and cached.listing_id and cached.content_hash == content_hash:
+        return {**unchanged, "listing_id": cached.listing_id}
+    return {
+        "url": url,
+        "html": response.text,
+        "scraped_at": scraped_at,
+        "bytes": len(response.content),
+        "cache_entry": CacheEntry(
+            url=url,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            content_hash=content_hash,
+        ),
+    }
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from datetime import datetime
+from urllib.parse import urlparse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .models import Listing, ListingSource
+from .parsing import hash_listing_id
+
+# Higher wins the canonical row's source, dealer_vdp_url and confidence_score.
+SOURCE_PRIORITY = {"dealer_site": 3, "manual": 2, "aggregator": 1, "search": 0}
+_PRESERVED_COLUMNS = frozenset({"source", "dealer_vdp_url", "confidence_score"})
+
+
+def vehicle_key(normalized: dict) -> str | None:
+    if normalized.get("vin"):
+        return f"vin:{normalized['vin'].upper()}"
+    dealer = normalized.get("dealer_name")
+    if not dealer and normalized.get("source") == "dealer_site":
+        dealer = urlparse(normalized["dealer_vdp_url"]).netloc
+    if dealer and normalized.get("stock_no"):
+        return f"stock:{dealer.lower()}:{normalized['stock_no'].upper()}"
+    return None
+
+
+@dataclass
+class Resolution:
+    listing_id: str
+    preserve: frozenset[str]
+    sighting: dict
+    first_this_sweep: bool
+
+
+class IdentityIndex:
+    """Resolves every sighting of a car (by VIN, else dealer + stock number) to one canonical listing."""
+
+    def __init__(
+        self,
+        canonical: dict[str, tuple[str, str]],
+        url_keys: dict[str, str],
+        fresh: set[str] | None = None,
+    ):
+        self._canonical = canonical
+        self._url_keys = url_keys
+        self._fresh = fresh or set()
+
+    @classmethod
+    def load(cls, db: Session, since: datetime | None = None) -> "IdentityIndex":
+        canonical: dict[str, tuple[str, str]] = {}
+        fresh: set[str] = set()
+        rows = db.execute(
+            select(Listing.vehicle_key, Listing.listing_id, Listing.source, Listing.date_last_seen)
+            .where(Listing.vehicle_key.is_not(None), Listing.listing_status == "active")
+            .order_by(Listing.date_first_seen)
+        )
+        for key, listing_id, source, last_seen in rows:
+            canonical.setdefault(key, (listing_id, source))
+            if since and last_seen and last_seen >= since:
+                fresh.add(key)
+        url_keys = {
+            url: key
+            for url, key in db.execute(
+                select(ListingSource.url, ListingSource.vehicle_key).where(ListingSource.vehicle_key.is_not(None))
+            )
+        }
+        return cls(canonical, url_keys, fresh)
+
+    def fresh_listing(self, url: str) -> str | None:
+        """Canonical listing_id if this URL's car was already scraped this sweep under any URL."""
+        key = self._url_keys.get(url)
+        if key in self._fresh:
+            return self._canonical[key][0]
+        return None
+
+    def mark_seen(self, url: str) -> None:
+        key = self._url_keys.get(url)
+        if key in self._canonical:
+            self._fresh.add(key)
+
+    def resolve(self, url: str, normalized: dict) -> Resolution:
+        """Point normalized at its canonical listing, dropping fields a better source already owns."""
+        source_listing_id = normalized["listing_id"]
+        source = normalized["source"]
+        key = vehicle_key(normalized)
+        listing_id, preserve, first = source_listing_id, frozenset(), True
+        if key:
+            self._url_keys[url] = key
+            listing_id, owner = self._canonical.setdefault(key, (source_listing_id, source))
+            if SOURCE_PRIORITY.get(source, 0) < SOURCE_PRIORITY.get(owner, 0):
+                preserve = _PRESERVED_COLUMNS
+                for column in [column for column, value in normalized.items() if value is None]:
+                    del normalized[column]
+            else:
+                self._canonical[key] = (listing_id, source)
+            first = key not in self._fresh
+            self._fresh.add(key)
+            normalized["listing_id"] = listing_id
+            normalized["vehicle_key"] = key
+        sighting = {
+            "url_hash": hash_listing_id(url),
+            "url": url,
+            "source": source,
+            "listing_id": listing_id,
+            "source_listing_id": source_listing_id,
+            "vehicle_key": key,
+            "first_seen": normalized["last_scraped_at"],
+            "last_seen": normalized["last_scraped_at"],
+        }
+        return Resolution(listing_id, preserve, sighting, first)
@@ -1,82 +1,213 @@
+import asyncio
+from collections.abc import AsyncIterator
 from datetime import datetime
+from urllib.parse import urlparse
 from loguru import logger
 from rq import Queue
-from redis import Redis
+from rq.job import Dependency
+from redis import Redis, RedisError
 from sqlalchemy.orm import Session
 from .config import settings
 from .db import SessionLocal
-from .models import Listing, ScrapeJob, Alert
+from .models import ScrapeJob
+from .adapters.base import SourceAdapter
 from .adapters.dealer_site import DealerSiteAdapter
 from .adapters.aggregator import AggregatorAdapter
 from .adapters.search import SearchAdapter
 from .adapters.manual import ManualAdapter
-from .notifications import send_email
+from .frontier import UrlFrontier, canonicalize_url
+from .metrics import merge_metrics
+from .pipeline import ScrapePipeline
+from .scheduler import RecrawlPlan
 
 
 redis_conn = Redis.from_url(settings.redis_url)
 queue = Queue(connection=redis_conn)
 
+# Must equal GENERATION_KEY in backend/app/cache.py, the source of truth; the API caches listing
+# responses per generation and this worker bumps it.
+LISTINGS_GENERATION_KEY = "listings:generation"
 
-def meets_alert(alert: Alert, listing: Listing) -> bool:
-    if alert.min_discount_percent and listing.msrp and listing.advertised_price:
-        discount = (listing.msrp - listing.advertised_price) / listing.msrp * 100
-        if discount < alert.min_discount_percent:
-            return False
-    if alert.max_miles and listing.miles and listing.miles > alert.max_miles:
-        return False
-    if alert.max_price and listing.advertised_price and listing.advertised_price > alert.max_price:
+ADAPTER_TYPES: dict[str, type[SourceAdapter]] = {
+    adapter.source_name: adapter
+    for adapter in (DealerSiteAdapter, AggregatorAdapter, SearchAdapter, ManualAdapter)
+}
+
+
+async def _stream_targets(targets: list[tuple[str, str]]) -> AsyncIterator[tuple[SourceAdapter, str]]:
+    adapters = {source: ADAPTER_TYPES[source]([]) for source in {source for source, _ in targets}}
+    for source, url in targets:
+        yield adapters[source], url
+
+
+def _admit(frontier: UrlFrontier, plan: RecrawlPlan, source: str, url: str) -> bool:
+    if not frontier.claim(url):
         return False
-    if alert.states and listing.dealer_state and listing.dealer_state not in alert.states:
+    if not plan.select(source, url):
+        frontier.mark(url, "not_due")
         return False
     return True
 
 
-def run_scrape_job():
-    db: Session = SessionLocal()
-    job = ScrapeJob(source="all", status="running", started_at=datetime.utcnow())
-    db.add(job)
-    db.commit()
-    db.refresh(job)
+def _due_leftovers(frontier: UrlFrontier, plan: RecrawlPlan) -> list[tuple[str, str]]:
+    """Due listings discovery did not find, claimed through the frontier like any discovered URL."""
+    return [(source, url) for source, url in plan.leftovers() if frontier.claim(url)]
 
-    blocked_domains: list[str] = []
-    failures = 0
-    adapters = [
+
+async def _stream_discovery(
+    adapters: list[SourceAdapter], plan: RecrawlPlan, frontier: UrlFrontier
+) -> AsyncIterator[tuple[SourceAdapter, str]]:
+    for adapter in adapters:
+        async for url in adapter.discover_async():
+            if await asyncio.to_thread(_admit, frontier, plan, adapter.source_name, url):
+                yield adapter, url
+    async for target in _stream_targets(_due_leftovers(frontier, plan)):
+        yield target
+
+
+def _build_adapters() -> list[SourceAdapter]:
+    return [
         DealerSiteAdapter([]),
         AggregatorAdapter([]),
         SearchAdapter(["BMW i7 loaner \"service loaner\""]),
         ManualAdapter([]),
     ]
 
-    for adapter in adapters:
-        for url in adapter.discover():
-            try:
-                raw = adapter.scrape_listing(url)
-                normalized = adapter.normalize(raw)
-                if normalized.get("blocked"):
-                    blocked_domains.append(url)
-                    continue
-                listing = Listing(**normalized)
-                db.merge(listing)
-                db.commit()
-
-                alerts = db.query(Alert).all()
-                for alert in alerts:
-                    if meets_alert(alert, listing):
-                        send_email(
-                            alert.user_email,
-                            f\"New i7 loaner deal: {listing.dealer_name or 'Dealer'}\",
-                            f\"Deal link: {listing.dealer_vdp_url}\",
-                        )
-            except Exception as exc:
-                failures += 1
-                logger.exception("Failed to scrape %s: %s", url, exc)
-
-    job.status = "completed"
+
+def invalidate_listing_responses() -> None:
+    try:
+        redis_conn.incr(LISTINGS_GENERATION_KEY)
+    except RedisError as exc:
+        logger.warning("Failed to invalidate cached listing responses: {}", exc)
+
+
+def _discover_shards(
+    adapters: list[SourceAdapter], plan: RecrawlPlan, frontier: UrlFrontier
+) -> dict[str, list[tuple[str, str]]]:
+    targets = [
+        (adapter.source_name, url)
+        for adapter in adapters
+        for url in adapter.discover()
+        if _admit(frontier, plan, adapter.source_name, url)
+    ]
+    targets += _due_leftovers(frontier, plan)
+    shards: dict[str, list[tuple[str, str]]] = {}
+    for source, url in targets:
+        shards.setdefault(urlparse(canonicalize_url(url)).netloc, []).append((source, url))
+    return shards
+
+
+def _shard_timeout(urls: int) -> int:
+    # A shard fetches a single domain, so its requests are spaced by the rate limit; allow twice that per URL.
+    return int(settings.shard_job_timeout_s + 2 * urls * settings.request_rate_limit_s)
+
+
+def _execute_job(job_id: int, targets: AsyncIterator[tuple[SourceAdapter, str]]):
+    db: Session = SessionLocal()
+    job = db.get(ScrapeJob, job_id)
+    job.status = "running"
+    job.started_at = datetime.utcnow()
+    db.commit()
+    pipeline: ScrapePipeline | None = None
+    try:
+        sweep = db.get(ScrapeJob, job.parent_id) if job.parent_id else job
+        pipeline = ScrapePipeline(db, sweep_started_at=sweep.started_at, frontier=UrlFrontier(sweep.id))
+        job.blocked_domains, job.failures = asyncio.run(pipeline.run(targets))
+        job.status = "completed"
+    except Exception:
+        db.rollback()
+        job.status = "failed"
+        logger.exception("Scrape job {} ({}) failed", job_id, job.domain or job.source)
     job.finished_at = datetime.utcnow()
-    job.failures = failures
+    if pipeline:
+        job.metrics = pipeline.metrics.to_dict()
+    is_shard = job.parent_id is not None
+    db.commit()
+    db.close()
+    if not is_shard:
+        invalidate_listing_responses()
+
+
+def run_shard_job(job_id: int, targets: list[tuple[str, str]]):
+    _execute_job(job_id, _stream_targets(targets))
+
+
+def finalize_scrape_job(job_id: int):
+    db: Session = SessionLocal()
+    job = db.get(ScrapeJob, job_id)
+    children = db.query(ScrapeJob).filter(ScrapeJob.parent_id == job_id).all()
+    finished_at = datetime.utcnow()
+    blocked_domains: list[str] = []
+    for child in children:
+        blocked_domains.extend(child.blocked_domains or [])
+        # Every shard has ended by now; one still queued or running was killed or never started.
+        if child.status in ("queued", "running"):
+            child.status = "failed"
+            child.finished_at = finished_at
+    job.status = "completed" if all(child.status == "completed" for child in children) else "failed"
+    job.finished_at = finished_at
+    job.failures = sum(child.failures or 0 for child in children)
     job.blocked_domains = blocked_domains
+    job.metrics = merge_metrics(
+        [child.metrics for child in children if child.metrics],
+        (job.finished_at - job.started_at).total_seconds(),
+    )
     db.commit()
     db.close()
+    invalidate_listing_responses()
+
+
+def run_scrape_job(shard: bool = True):
+    db: Session = SessionLocal()
+    job = ScrapeJob(source="all", status="running", started_at=datetime.utcnow())
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    job_id = job.id
+    plan = RecrawlPlan.load(db)
+    frontier = UrlFrontier(job_id)
+
+    if not shard:
+        # The plan looks up discovered URLs through db, so it stays open until discovery is done.
+        try:
+            _execute_job(job_id, _stream_discovery(_build_adapters(), plan, frontier))
+        finally:
+            db.close()
+        return
+
+    try:
+        shards = _discover_shards(_build_adapters(), plan, frontier)
+    except Exception:
+        logger.exception("Discovery for scrape job {} failed", job_id)
+        job.status = "failed"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        db.close()
+        return
+    children = [
+        ScrapeJob(source="shard", status="queued", parent_id=job_id, domain=domain)
+        for domain in shards
+    ]
+    db.add_all(children)
+    db.commit()
+    child_jobs = [
+        queue.enqueue(
+            run_shard_job,
+            child.id,
+            shards[child.domain],
+            job_timeout=_shard_timeout(len(shards[child.domain])),
+        )
+        for child in children
+    ]
+    db.close()
+    if not child_jobs:
+        finalize_scrape_job(job_id)
+        return
+    queue.enqueue(
+        finalize_scrape_job,
+        job_id,
+        depends_on=Dependency(jobs=child_jobs, allow_failure=True),
+    )
 
 
 def enqueue_scrape_job():
@@ -84,4 +215,4 @@ def enqueue_scrape_job():
 
 
 if __name__ == "__main__":
-    run_scrape_job()
+    run_scrape_job(shard=False)
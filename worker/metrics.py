@@ -0,0 +1,111 @@
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+LATENCY_BUCKETS_S = [0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+STAGES = ["fetch", "parse", "upsert", "alert"]
+
+
+def _bucket_label(seconds: float) -> str:
+    for bound in LATENCY_BUCKETS_S:
+        if seconds <= bound:
+            return str(bound)
+    return "+Inf"
+
+
+def _empty_domain() -> dict:
+    return {
+        "requests": 0,
+        "failures": 0,
+        "bytes": 0,
+        "fetch_seconds": 0.0,
+        "latency_histogram": {label: 0 for label in [*map(str, LATENCY_BUCKETS_S), "+Inf"]},
+    }
+
+
+class JobMetrics:
+    """Per-stage timings and per-domain fetch stats for one scrape job, stored as ScrapeJob.metrics."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.pages = 0
+        self.unchanged = 0
+        self.blocked = 0
+        self.stages = {stage: {"count": 0, "seconds": 0.0} for stage in STAGES}
+        self.domains: dict[str, dict] = {}
+
+    def _domain(self, url: str) -> dict:
+        return self.domains.setdefault(urlparse(url).netloc, _empty_domain())
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name]["count"] += 1
+            self.stages[name]["seconds"] += time.perf_counter() - started
+
+    def record_fetch(self, url: str, seconds: float, size: int, ok: bool) -> None:
+        self.stages["fetch"]["count"] += 1
+        self.stages["fetch"]["seconds"] += seconds
+        domain = self._domain(url)
+        domain["requests"] += 1
+        domain["bytes"] += size
+        domain["fetch_seconds"] += seconds
+        domain["latency_histogram"][_bucket_label(seconds)] += 1
+        if ok:
+            self.pages += 1
+        else:
+            domain["failures"] += 1
+
+    def record_unchanged(self) -> None:
+        self.unchanged += 1
+
+    def record_blocked(self) -> None:
+        self.blocked += 1
+
+    def record_failure(self, url: str) -> None:
+        self._domain(url)["failures"] += 1
+
+    def to_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "pages": self.pages,
+            "unchanged": self.unchanged,
+            "blocked": self.blocked,
+            "pages_per_s": round(self.pages / elapsed, 3) if elapsed else 0.0,
+            "stages": {name: {**totals, "seconds": round(totals["seconds"], 3)} for name, totals in self.stages.items()},
+            "domains": {
+                name: {**stats, "fetch_seconds": round(stats["fetch_seconds"], 3)}
+                for name, stats in self.domains.items()
+            },
+        }
+
+
+def merge_metrics(metrics: list[dict], elapsed_s: float) -> dict:
+    merged = {
+        "elapsed_s": round(elapsed_s, 3),
+        "pages": 0,
+        "unchanged": 0,
+        "blocked": 0,
+        "stages": {stage: {"count": 0, "seconds": 0.0} for stage in STAGES},
+        "domains": {},
+    }
+    for item in metrics:
+        for key in ("pages", "unchanged", "blocked"):
+            merged[key] += item.get(key, 0)
+        for name, totals in item.get("stages", {}).items():
+            stage = merged["stages"].setdefault(name, {"count": 0, "seconds": 0.0})
+            stage["count"] += totals["count"]
+            stage["seconds"] = round(stage["seconds"] + totals["seconds"], 3)
+        for name, stats in item.get("domains", {}).items():
+            domain = merged["domains"].setdefault(name, _empty_domain())
+            for key in ("requests", "failures", "bytes"):
+                domain[key] += stats[key]
+            domain["fetch_seconds"] = round(domain["fetch_seconds"] + stats["fetch_seconds"], 3)
+            for label, count in stats["latency_histogram"].items():
+                domain["latency_histogram"][label] = domain["latency_histogram"].get(label, 0) + count
+    merged["pages_per_s"] = round(merged["pages"] / elapsed_s, 3) if elapsed_s else 0.0
+    return merged
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, Float, Boolean, DateTime, JSON, Text
+from sqlalchemy import String, Integer, Float, Boolean, DateTime, JSON, Text, ForeignKey, Index, and_
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 from .db import Base
@@ -38,18 +38,84 @@ class Listing(Base):
     last_scraped_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     listing_status: Mapped[str] = mapped_column(String(16), default="active")
     confidence_score: Mapped[float] = mapped_column(Float, default=0.0)
+    visit_count: Mapped[int] = mapped_column(Integer, default=0)
+    change_count: Mapped[int] = mapped_column(Integer, default=0)
+    next_visit_at: Mapped[datetime | None] = mapped_column(DateTime, index=True)
+    vehicle_key: Mapped[str | None] = mapped_column(String(96), index=True)
+    score: Mapped[float | None] = mapped_column(Float)
+    discount_percent: Mapped[float | None] = mapped_column(Float)
+    value_components: Mapped[dict | None] = mapped_column(JSON)
+    scoring_version: Mapped[int | None] = mapped_column(Integer)
+
+
+# Keyset pagination over active listings: one partial index per sort order, plus the common state filter.
+# Rows are scored at write time (and by app.rescore), so the score orders can skip unscored rows.
+def _active(*conditions):
+    where = and_(Listing.listing_status == "active", *conditions)
+    return {"postgresql_where": where, "sqlite_where": where}
+
+
+Index("ix_listings_active_score", Listing.score.desc(), Listing.id.desc(), **_active(Listing.score.is_not(None)))
+Index(
+    "ix_listings_active_discount",
+    Listing.discount_percent.desc(),
+    Listing.id.desc(),
+    **_active(Listing.discount_percent.is_not(None)),
+)
+Index("ix_listings_active_recent", Listing.date_last_seen.desc(), Listing.id.desc(), **_active())
+Index(
+    "ix_listings_active_state_score",
+    Listing.dealer_state,
+    Listing.score.desc(),
+    Listing.id.desc(),
+    **_active(Listing.score.is_not(None)),
+)
+Index("ix_listings_active_trim_msrp", Listing.trim, Listing.msrp, **_active())
+
+
+class ListingSource(Base):
+    __tablename__ = "listing_sources"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    url_hash: Mapped[str] = mapped_column(String(64), unique=True, index=True)
+    url: Mapped[str] = mapped_column(Text)
+    source: Mapped[str] = mapped_column(String(32))
+    listing_id: Mapped[str] = mapped_column(String(64), index=True)
+    source_listing_id: Mapped[str] = mapped_column(String(64))
+    vehicle_key: Mapped[str | None] = mapped_column(String(96), index=True)
+    first_seen: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_seen: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class CohortStats(Base):
+    """Sorted discount distribution of the active listings sharing a trim and MSRP bucket."""
+
+    __tablename__ = "cohort_stats"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    trim: Mapped[str] = mapped_column(String(32))
+    msrp_bucket: Mapped[int] = mapped_column(Integer)
+    listing_count: Mapped[int] = mapped_column(Integer, default=0)
+    discounts: Mapped[list[float]] = mapped_column(JSON)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+Index("ix_cohort_stats_trim_bucket", CohortStats.trim, CohortStats.msrp_bucket, unique=True)
 
 
 class ScrapeJob(Base):
     __tablename__ = "scrape_jobs"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    parent_id: Mapped[int | None] = mapped_column(ForeignKey("scrape_jobs.id"), index=True)
     source: Mapped[str] = mapped_column(String(32))
+    domain: Mapped[str | None] = mapped_column(String(255))
     status: Mapped[str] = mapped_column(String(16), default="queued")
     started_at: Mapped[datetime | None] = mapped_column(DateTime)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime)
     failures: Mapped[int] = mapped_column(Integer, default=0)
     blocked_domains: Mapped[list[str] | None] = mapped_column(JSON)
+    metrics: Mapped[dict | None] = mapped_column(JSON)
 
 
 class Alert(Base):
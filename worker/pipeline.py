@@ -0,0 +1,208 @@
+import asyncio
+import multiprocessing
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections.abc import AsyncIterator, Awaitable, Callable
+from loguru import logger
+from sqlalchemy.orm import Session
+from .adapters.base import SourceAdapter
+from .alerts import AlertIndex
+from .archive import page_archive
+from .config import settings
+from .http import FetchEngine
+from .metrics import JobMetrics
+from .httpcache import CacheEntry, http_cache
+from .frontier import UrlFrontier
+from .identity import IdentityIndex
+from .models import Listing
+from .notifications import send_email
+from .writer import ListingWriter
+
+_DONE = object()
+_parse_pool: ProcessPoolExecutor | None = None
+
+
+def parse_pool() -> ProcessPoolExecutor | None:
+    """This process's normalization pool, started on first use and reused by every job the worker runs."""
+    global _parse_pool
+    if _parse_pool is None and settings.parse_workers > 0:
+        _parse_pool = ProcessPoolExecutor(settings.parse_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _parse_pool
+
+
+def restart_parse_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor | None:
+    """Replace a pool left broken by a dead worker process; parses that failed with it share one replacement."""
+    global _parse_pool
+    if _parse_pool is broken:
+        logger.warning("A parse worker process died; starting a new parse pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+    return parse_pool()
+
+
+class ScrapePipeline:
+    """Discover -> fetch -> parse -> persist stages joined by bounded queues for backpressure."""
+
+    def __init__(
+        self,
+        db: Session,
+        engine: FetchEngine | None = None,
+        sweep_started_at: datetime | None = None,
+        frontier: UrlFrontier | None = None,
+    ):
+        self.db = db
+        self.engine = engine or FetchEngine()
+        self.frontier = frontier
+        self.writer = ListingWriter(db, on_flush=self._record_cache_entries)
+        self.alert_index = AlertIndex.load(db)
+        self.identity = IdentityIndex.load(db, sweep_started_at)
+        self.blocked_domains: list[str] = []
+        self.failures = 0
+        self.metrics = JobMetrics()
+        self._parse_pool: ProcessPoolExecutor | None = None
+        self._cache_entries: dict[str, list[CacheEntry]] = {}
+
+    async def run(self, targets: AsyncIterator[tuple[SourceAdapter, str]]) -> tuple[list[str], int]:
+        fetch_queue: asyncio.Queue = asyncio.Queue(settings.pipeline_queue_size)
+        parse_queue: asyncio.Queue = asyncio.Queue(settings.pipeline_queue_size)
+        persist_queue: asyncio.Queue = asyncio.Queue(settings.pipeline_queue_size)
+        self._parse_pool = parse_pool()
+        await asyncio.gather(
+            self._discover(targets, fetch_queue),
+            self._stage(fetch_queue, parse_queue, self._fetch, settings.pipeline_fetch_workers),
+            self._stage(parse_queue, persist_queue, self._parse, max(settings.parse_workers, 1)),
+            self._persist(persist_queue),
+        )
+        with self.metrics.stage("upsert"):
+            await asyncio.to_thread(self.writer.flush)
+        return self.blocked_domains, self.failures
+
+    async def _discover(self, targets: AsyncIterator[tuple[SourceAdapter, str]], outbox: asyncio.Queue):
+        try:
+            async for target in targets:
+                await outbox.put(target)
+        except Exception as exc:
+            self.failures += 1
+            logger.exception("Discovery failed: {}", exc)
+        finally:
+            await outbox.put(_DONE)
+
+    async def _stage(
+        self,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        handler: Callable[[tuple], Awaitable[tuple | None]],
+        workers: int,
+    ):
+        async def work():
+            while (item := await inbox.get()) is not _DONE:
+                result = await handler(item)
+                if result is not None:
+                    await outbox.put(result)
+            await inbox.put(_DONE)
+
+        await asyncio.gather(*(work() for _ in range(workers)))
+        await outbox.put(_DONE)
+
+    async def _fetch(self, item: tuple[SourceAdapter, str]) -> tuple | None:
+        adapter, url = item
+        if listing_id := self.identity.fresh_listing(url):
+            logger.debug("Skipping {}: already scraped this sweep as {}", url, listing_id)
+            await self._mark(url, "duplicate")
+            return None
+        started = time.perf_counter()
+        try:
+            raw = await adapter.scrape_listing_async(url, self.engine)
+        except Exception as exc:
+            self.failures += 1
+            self.metrics.record_fetch(url, time.perf_counter() - started, 0, ok=False)
+            logger.exception("Failed to scrape {}: {}", url, exc)
+            await self._mark(url, "failed")
+            return None
+        self.metrics.record_fetch(url, time.perf_counter() - started, raw.get("bytes", 0), ok=True)
+        if raw.get("unchanged"):
+            self.metrics.record_unchanged()
+        await self._mark(url, "unchanged" if raw.get("unchanged") else "fetched")
+        if settings.archive_dir and raw.get("html"):
+            try:
+                await asyncio.to_thread(page_archive.store, url, adapter.source_name, raw["html"], raw["scraped_at"])
+            except Exception as exc:
+                logger.warning("Failed to archive {}: {}", url, exc)
+        return adapter, url, raw
+
+    async def _parse(self, item: tuple[SourceAdapter, str, dict]) -> tuple | None:
+        adapter, url, raw = item
+        if raw.get("unchanged"):
+            return url, raw
+        try:
+            with self.metrics.stage("parse"):
+                if self._parse_pool:
+                    loop = asyncio.get_running_loop()
+                    normalized = await loop.run_in_executor(self._parse_pool, adapter.normalize, raw)
+                else:
+                    normalized = adapter.normalize(raw)
+        except Exception as exc:
+            if isinstance(exc, BrokenProcessPool):
+                self._parse_pool = restart_parse_pool(self._parse_pool)
+            self.failures += 1
+            self.metrics.record_failure(url)
+            logger.exception("Failed to normalize {}: {}", url, exc)
+            await self._mark(url, "failed")
+            return None
+        if normalized.get("blocked"):
+            self.blocked_domains.append(url)
+            self.metrics.record_blocked()
+            await self._mark(url, "blocked")
+            return None
+        if raw.get("cache_entry"):
+            normalized["cache_entry"] = raw["cache_entry"]
+        return url, normalized
+
+    async def _persist(self, inbox: asyncio.Queue):
+        while (item := await inbox.get()) is not _DONE:
+            url, normalized = item
+            try:
+                # Writes can flush a batch (upsert, rescore, cohorts, reschedule) and alerts send email, so
+                # they run off the event loop; one persist worker keeps the session to a single thread at a time.
+                await asyncio.to_thread(self._persist_one, url, normalized)
+            except Exception as exc:
+                self.failures += 1
+                self.metrics.record_failure(url)
+                logger.exception("Failed to persist {}: {}", url, exc)
+
+    def _persist_one(self, url: str, normalized: dict):
+        if normalized.get("unchanged"):
+            self.identity.mark_seen(url)
+            with self.metrics.stage("upsert"):
+                self.writer.touch(normalized["listing_id"], normalized["scraped_at"])
+            return
+        cache_entry = normalized.pop("cache_entry", None)
+        resolution = self.identity.resolve(url, normalized)
+        if cache_entry:
+            cache_entry.listing_id = resolution.listing_id
+            self._cache_entries.setdefault(resolution.listing_id, []).append(cache_entry)
+        with self.metrics.stage("upsert"):
+            self.writer.add(normalized, resolution.preserve, resolution.sighting)
+        if not resolution.first_this_sweep:
+            return
+        with self.metrics.stage("alert"):
+            listing = Listing(**normalized)
+            for alert in self.alert_index.matches(listing):
+                send_email(
+                    alert.user_email,
+                    f"New i7 loaner deal: {listing.dealer_name or 'Dealer'}",
+                    f"Deal link: {listing.dealer_vdp_url}",
+                )
+
+    async def _mark(self, url: str, status: str):
+        if self.frontier:
+            await asyncio.to_thread(self.frontier.mark, url, status)
+
+    def _record_cache_entries(self, rows: list[dict]):
+        entries = [entry for row in rows for entry in self._cache_entries.pop(row["listing_id"], [])]
+        try:
+            http_cache.store(entries)
+        except Exception as exc:
+            logger.warning("Failed to record HTTP cache entries: {}", exc)
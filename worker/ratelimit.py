@@ -0,0 +1,52 @@
+import threading
+import time
+from loguru import logger
+from redis import Redis, RedisError
+from .config import settings
+
+# Single-token bucket kept as the time the next request may start (GCRA), using
+# the Redis clock so every worker box agrees on "now".
+_RESERVE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local spacing = tonumber(ARGV[1])
+local start = math.max(now, tonumber(redis.call('GET', KEYS[1]) or '0'))
+local ttl_ms = math.ceil((start + spacing - now) * 1000) + 1000
+redis.call('SET', KEYS[1], tostring(start + spacing), 'PX', ttl_ms)
+return tostring(start - now)
+"""
+
+
+class LocalRateLimiter:
+    def __init__(self):
+        self._next_free: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, domain: str, spacing: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free.get(domain, 0))
+            self._next_free[domain] = start + spacing
+            return start - now
+
+
+class RedisRateLimiter:
+    def __init__(self, redis_conn: Redis):
+        self._reserve = redis_conn.register_script(_RESERVE_SCRIPT)
+        self._fallback = LocalRateLimiter()
+
+    def reserve(self, domain: str, spacing: float) -> float:
+        try:
+            return float(self._reserve(keys=[f"ratelimit:{domain}"], args=[spacing]))
+        except RedisError as exc:
+            logger.warning("Shared rate limiter unavailable for {}: {}", domain, exc)
+            return self._fallback.reserve(domain, spacing)
+
+
+def build_rate_limiter() -> LocalRateLimiter | RedisRateLimiter:
+    if settings.rate_limit_backend == "local":
+        return LocalRateLimiter()
+    return RedisRateLimiter(Redis.from_url(settings.redis_url))
+
+
+limiter = build_rate_limiter()
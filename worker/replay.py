@@ -0,0 +1,56 @@
+import argparse
+from datetime import datetime
+from loguru import logger
+from .archive import page_archive
+from .db import SessionLocal
+from .identity import IdentityIndex
+from .main import ADAPTER_TYPES, invalidate_listing_responses
+from .writer import ListingWriter
+
+
+def replay(
+    source: str | None = None,
+    adapter_name: str | None = None,
+    since: datetime | None = None,
+    latest_only: bool = True,
+    dry_run: bool = False,
+) -> tuple[int, int]:
+    """Re-normalize archived pages and upsert them without touching the network."""
+    db = SessionLocal()
+    try:
+        writer = ListingWriter(db, replay=True)
+        identity = IdentityIndex.load(db)
+        adapters = {name: adapter([]) for name, adapter in ADAPTER_TYPES.items()}
+        replayed = failures = 0
+        for page in page_archive.pages(source=source, since=since, latest_only=latest_only):
+            adapter = adapters[adapter_name or page.source]
+            try:
+                raw = {"url": page.url, "html": page_archive.load(page.content_hash), "scraped_at": page.scraped_at}
+                normalized = adapter.normalize(raw)
+                if normalized.get("blocked"):
+                    continue
+                if not dry_run:
+                    resolution = identity.resolve(page.url, normalized)
+                    writer.add(normalized, resolution.preserve, resolution.sighting)
+                replayed += 1
+            except Exception as exc:
+                failures += 1
+                logger.exception("Failed to replay {}: {}", page.url, exc)
+        writer.flush()
+    finally:
+        db.close()
+    if not dry_run:
+        invalidate_listing_responses()
+    return replayed, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay archived pages through adapter normalize and upsert.")
+    parser.add_argument("--source", help="Only replay pages scraped by this adapter.")
+    parser.add_argument("--adapter", choices=sorted(ADAPTER_TYPES), help="Normalize with this adapter instead.")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only pages scraped at or after this time.")
+    parser.add_argument("--all-versions", action="store_true", help="Replay every archived fetch, oldest first.")
+    parser.add_argument("--dry-run", action="store_true", help="Normalize without writing listings.")
+    args = parser.parse_args()
+    replayed, failures = replay(args.source, args.adapter, args.since, not args.all_versions, args.dry_run)
+    logger.info("Replayed {} archived pages ({} failures)", replayed, failures)
@@ -1,20 +1,73 @@
+import json
+import time
 import urllib.robotparser
 from urllib.parse import urlparse
+import requests
+from loguru import logger
+from redis import Redis, RedisError
+from .config import settings
+from .session import session
 
+redis_conn = Redis.from_url(settings.redis_url)
+_cache: dict[str, tuple[urllib.robotparser.RobotFileParser, float]] = {}
 
-_cache: dict[str, urllib.robotparser.RobotFileParser] = {}
 
+def _fetch_rules(base: str) -> tuple[dict, int]:
+    try:
+        response = session.get(f"{base}/robots.txt", timeout=10)
+    except requests.RequestException:
+        return {"status": None}, settings.robots_negative_ttl_s
+    if response.status_code >= 500:
+        return {"status": response.status_code}, settings.robots_negative_ttl_s
+    body = response.text if response.ok else ""
+    return {"status": response.status_code, "body": body}, settings.robots_cache_ttl_s
 
-def allowed(url: str, user_agent: str = "i7-scanner") -> bool:
+
+def _build_parser(rules: dict) -> urllib.robotparser.RobotFileParser:
+    parser = urllib.robotparser.RobotFileParser()
+    status = rules["status"]
+    if status is None or status >= 500 or status in (401, 403):
+        parser.disallow_all = True
+    elif status >= 400:
+        parser.allow_all = True
+    else:
+        parser.parse(rules["body"].splitlines())
+    return parser
+
+
+def _load_parser(base: str) -> tuple[urllib.robotparser.RobotFileParser, int]:
+    key = f"robots:{base}"
+    try:
+        cached, ttl = redis_conn.pipeline().get(key).ttl(key).execute()
+    except RedisError as exc:
+        logger.warning("Robots cache read failed for {}: {}", base, exc)
+        cached, ttl = None, 0
+    if cached:
+        return _build_parser(json.loads(cached)), max(ttl, 0)
+
+    rules, ttl = _fetch_rules(base)
+    try:
+        redis_conn.set(key, json.dumps(rules), ex=ttl)
+    except RedisError as exc:
+        logger.warning("Robots cache write failed for {}: {}", base, exc)
+    return _build_parser(rules), ttl
+
+
+def _parser_for(url: str) -> urllib.robotparser.RobotFileParser:
     parsed = urlparse(url)
     base = f"{parsed.scheme}://{parsed.netloc}"
-    parser = _cache.get(base)
-    if not parser:
-        parser = urllib.robotparser.RobotFileParser()
-        parser.set_url(f"{base}/robots.txt")
-        try:
-            parser.read()
-        except Exception:
-            return False
-        _cache[base] = parser
-    return parser.can_fetch(user_agent, url)
+    entry = _cache.get(base)
+    if entry and entry[1] > time.time():
+        return entry[0]
+    parser, ttl = _load_parser(base)
+    _cache[base] = (parser, time.time() + ttl)
+    return parser
+
+
+def allowed(url: str, user_agent: str = "i7-scanner") -> bool:
+    return _parser_for(url).can_fetch(user_agent, url)
+
+
+def crawl_delay(url: str, user_agent: str = "i7-scanner") -> float | None:
+    delay = _parser_for(url).crawl_delay(user_agent)
+    return float(delay) if delay is not None else None
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, exists, or_, select
+from sqlalchemy.orm import Session
+from .config import settings
+from .models import Listing, ListingSource
+from .parsing import hash_listing_id
+
+# Only sources that actually fetch a page benefit from being revisited on a schedule.
+RECRAWL_URL_COLUMNS = {"dealer_site": Listing.dealer_vdp_url, "aggregator": Listing.aggregator_url}
+
+
+def next_visit_at(
+    now: datetime,
+    visit_count: int,
+    change_count: int,
+    msrp: float | None,
+    advertised_price: float | None,
+    first_seen: datetime | None,
+) -> datetime:
+    change_rate = (change_count + 1) / (visit_count + 2)
+    discount = (msrp - advertised_price) / msrp * 100 if msrp and advertised_price else 0.0
+    age_days = (now - first_seen).total_seconds() / 86400 if first_seen else 0.0
+    interval = settings.recrawl_base_interval_s / (2 * change_rate)
+    interval /= 1 + max(discount, 0.0) / 2.5
+    interval *= 1 + age_days / 30
+    interval = min(max(interval, settings.recrawl_min_interval_s), settings.recrawl_max_interval_s)
+    return now + timedelta(seconds=interval)
+
+
+def reschedule(db: Session, listing_ids: list[str], now: datetime | None = None) -> None:
+    if not listing_ids:
+        return
+    now = now or datetime.utcnow()
+    rows = db.execute(
+        select(
+            Listing.listing_id,
+            Listing.visit_count,
+            Listing.change_count,
+            Listing.msrp,
+            Listing.advertised_price,
+            Listing.date_first_seen,
+        ).where(Listing.listing_id.in_(listing_ids))
+    ).all()
+    if not rows:
+        return
+    table = Listing.__table__
+    db.execute(
+        table.update()
+        .where(table.c.listing_id == bindparam("scheduled_id"))
+        .values(next_visit_at=bindparam("scheduled_at")),
+        [
+            {
+                "scheduled_id": row.listing_id,
+                "scheduled_at": next_visit_at(
+                    now, row.visit_count or 0, row.change_count or 0, row.msrp, row.advertised_price, row.date_first_seen
+                ),
+            }
+            for row in rows
+        ],
+    )
+
+
+class RecrawlPlan:
+    """Per-sweep filter: new URLs always pass, known fetched URLs only when due and within budget.
+
+    Only the due URLs are loaded up front; any other discovered URL is looked up by its hash.
+    """
+
+    def __init__(self, db: Session, due: list[tuple[str, str]]):
+        self.db = db
+        self._due = {url: source for source, url in due}
+
+    @classmethod
+    def load(cls, db: Session, now: datetime | None = None, budget: int | None = None) -> "RecrawlPlan":
+        now = now or datetime.utcnow()
+        budget = settings.recrawl_sweep_budget if budget is None else budget
+        due: list[tuple[datetime, str, str]] = []
+        for source, column in RECRAWL_URL_COLUMNS.items():
+            due.extend(
+                (visit_at or datetime.min, source, url)
+                for url, visit_at in db.execute(
+                    select(column, Listing.next_visit_at)
+                    .where(Listing.source == source, column.is_not(None))
+                    .where((Listing.next_visit_at.is_(None)) | (Listing.next_visit_at <= now))
+                    .order_by(Listing.next_visit_at.asc().nulls_first())
+                    .limit(budget)
+                )
+            )
+        due.sort()
+        return cls(db, [(source, url) for _, source, url in due[:budget]])
+
+    def _known(self, url: str) -> bool:
+        # Sightings cover every URL since identity tracking; listing_id covers older dealer pages.
+        url_hash = hash_listing_id(url)
+        return self.db.scalar(
+            select(
+                or_(
+                    exists().where(ListingSource.url_hash == url_hash),
+                    exists().where(Listing.listing_id == url_hash),
+                )
+            )
+        )
+
+    def select(self, source: str, url: str) -> bool:
+        if source not in RECRAWL_URL_COLUMNS or self._due.pop(url, None) is not None:
+            return True
+        return not self._known(url)
+
+    def leftovers(self) -> list[tuple[str, str]]:
+        due, self._due = self._due, {}
+        return [(source, url) for url, source in due.items()]
@@ -0,0 +1,199 @@
+import numpy as np
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+from .models import Listing
+
+# Mirrors backend/app/scoring.py; keep SCORING_VERSION and the weights in step with it.
+SCORING_VERSION = 1
+
+TRIM_BASELINES = {
+    "eDrive50": 105000,
+    "xDrive60": 120000,
+    "M70": 145000,
+}
+_TRIM_SCORES = {trim: baseline / max(TRIM_BASELINES.values()) for trim, baseline in TRIM_BASELINES.items()}
+_DEFAULT_TRIM_SCORE = 120000 / max(TRIM_BASELINES.values())
+
+
+DEFAULT_WEIGHTS = {
+    "discount_percent": 0.5,
+    "miles": 0.2,
+    "trim_baseline": 0.1,
+    "incentives": 0.1,
+    "lease_quality": 0.1,
+}
+
+
+def compute_discount_percent(msrp: float | None, price: float | None) -> float:
+    if not msrp or not price:
+        return 0.0
+    return max((msrp - price) / msrp, 0.0)
+
+
+def score_miles(miles: int | None) -> float:
+    if miles is None:
+        return 0.3
+    if miles <= 5000:
+        return 1.0
+    if miles <= 10000:
+        return 0.7
+    if miles <= 15000:
+        return 0.4
+    return 0.1
+
+
+def score_trim(trim: str | None) -> float:
+    if not trim:
+        return 0.5
+    return _TRIM_SCORES.get(trim, _DEFAULT_TRIM_SCORE)
+
+
+def score_incentives(incentives: list[dict] | None) -> float:
+    if not incentives:
+        return 0.2
+    stackable = any(item.get("stackable") for item in incentives)
+    total = sum(item.get("amount", 0) for item in incentives)
+    base = min(total / 10000, 1.0)
+    return base + (0.2 if stackable else 0.0)
+
+
+def score_lease_quality(lease_terms: dict | None) -> float:
+    if not lease_terms:
+        return 0.2
+    due_at_signing = lease_terms.get("due_at_signing") or 0
+    payment = lease_terms.get("payment") or 0
+    score = 1.0
+    if due_at_signing > 3000:
+        score -= 0.3
+    if payment > 1500:
+        score -= 0.3
+    return max(score, 0.1)
+
+
+def compute_value_score(listing: dict, weights: dict | None = None) -> dict:
+    weights = weights or DEFAULT_WEIGHTS
+    discount_percent = compute_discount_percent(listing.get("msrp"), listing.get("advertised_price"))
+    components = {
+        "discount_percent": discount_percent,
+        "miles": score_miles(listing.get("miles")),
+        "trim_baseline": score_trim(listing.get("trim")),
+        "incentives": score_incentives(listing.get("incentives")),
+        "lease_quality": score_lease_quality(listing.get("lease_terms")),
+    }
+    score = sum(components[key] * weights[key] for key in weights)
+    return {
+        "score": round(score, 4),
+        "discount_percent": round(discount_percent * 100, 2),
+        "value_components": components,
+    }
+
+
+def value_component_arrays(listings: list[dict]) -> dict[str, np.ndarray]:
+    """The score_* components of many listings as columns, one array per component."""
+    msrp = np.array([listing.get("msrp") or 0 for listing in listings], dtype=float)
+    price = np.array([listing.get("advertised_price") or 0 for listing in listings], dtype=float)
+    miles = np.array([listing.get("miles") for listing in listings], dtype=float)
+    incentives = [listing.get("incentives") or [] for listing in listings]
+    leases = [listing.get("lease_terms") or {} for listing in listings]
+    trims = [listing.get("trim") for listing in listings]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        discount = np.where((msrp != 0) & (price != 0), np.maximum((msrp - price) / msrp, 0.0), 0.0)
+    miles_score = np.select(
+        [np.isnan(miles), miles <= 5000, miles <= 10000, miles <= 15000], [0.3, 1.0, 0.7, 0.4], default=0.1
+    )
+    trim_score = np.array([_TRIM_SCORES.get(trim, _DEFAULT_TRIM_SCORE) if trim else 0.5 for trim in trims])
+    incentive_total = np.array([sum(item.get("amount", 0) for item in items) for items in incentives], dtype=float)
+    stackable = np.array([any(item.get("stackable") for item in items) for items in incentives], dtype=bool)
+    incentive_score = np.where(
+        np.array([bool(items) for items in incentives], dtype=bool),
+        np.minimum(incentive_total / 10000, 1.0) + np.where(stackable, 0.2, 0.0),
+        0.2,
+    )
+    due_at_signing = np.array([lease.get("due_at_signing") or 0 for lease in leases], dtype=float)
+    payment = np.array([lease.get("payment") or 0 for lease in leases], dtype=float)
+    lease_score = np.where(
+        np.array([bool(lease) for lease in leases], dtype=bool),
+        np.maximum(1.0 - np.where(due_at_signing > 3000, 0.3, 0.0) - np.where(payment > 1500, 0.3, 0.0), 0.1),
+        0.2,
+    )
+    return {
+        "discount_percent": discount,
+        "miles": miles_score,
+        "trim_baseline": trim_score,
+        "incentives": incentive_score,
+        "lease_quality": lease_score,
+    }
+
+
+def weighted_scores(components: dict[str, np.ndarray], weights: dict | None = None) -> np.ndarray:
+    """Unrounded scores, summed in weights order exactly like compute_value_score."""
+    weights = weights or DEFAULT_WEIGHTS
+    score = np.zeros(len(components["discount_percent"]))
+    for key, weight in weights.items():
+        score = score + components[key] * weight
+    return score
+
+
+def compute_value_scores(listings: list[dict], weights: dict | None = None) -> list[dict]:
+    """compute_value_score for many listings at once; results are identical to the scalar path."""
+    if not listings:
+        return []
+    components = value_component_arrays(listings)
+    score = weighted_scores(components, weights)
+    # Python's round() rather than np.round so the stored values match compute_value_score exactly.
+    return [
+        {
+            "score": round(total, 4),
+            "discount_percent": round(percent, 2),
+            "value_components": {
+                "discount_percent": discount_value,
+                "miles": miles_value,
+                "trim_baseline": trim_value,
+                "incentives": incentive_value,
+                "lease_quality": lease_value,
+            },
+        }
+        for total, percent, discount_value, miles_value, trim_value, incentive_value, lease_value in zip(
+            score.tolist(),
+            (components["discount_percent"] * 100).tolist(),
+            *(column.tolist() for column in components.values()),
+        )
+    ]
+
+
+def score_columns(listings: list[dict]) -> list[dict]:
+    return [{**result, "scoring_version": SCORING_VERSION} for result in compute_value_scores(listings)]
+
+
+def rescore(db: Session, listing_ids: list[str]) -> None:
+    if not listing_ids:
+        return
+    rows = db.execute(
+        select(
+            Listing.listing_id,
+            Listing.msrp,
+            Listing.advertised_price,
+            Listing.miles,
+            Listing.trim,
+            Listing.incentives,
+            Listing.lease_terms,
+        ).where(Listing.listing_id.in_(listing_ids))
+    ).all()
+    if not rows:
+        return
+    table = Listing.__table__
+    db.execute(
+        table.update()
+        .where(table.c.listing_id == bindparam("scored_id"))
+        .values(
+            score=bindparam("new_score"),
+            discount_percent=bindparam("new_discount_percent"),
+            value_components=bindparam("new_value_components"),
+            scoring_version=bindparam("new_scoring_version"),
+        ),
+        [
+            {"scored_id": row.listing_id, **{f"new_{key}": value for key, value in columns.items()}}
+            for row, columns in zip(rows, score_columns([row._asdict() for row in rows]))
+        ],
+    )
@@ -0,0 +1,18 @@
+from http.cookiejar import DefaultCookiePolicy
+import requests
+from requests.adapters import HTTPAdapter
+from .config import settings
+
+
+def _build_session() -> requests.Session:
+    # urllib3 keeps one keep-alive pool per host; brotli in requirements adds "br" to Accept-Encoding.
+    pooled = HTTPAdapter(pool_connections=settings.http_pool_hosts, pool_maxsize=settings.http_pool_maxsize)
+    session = requests.Session()
+    session.mount("http://", pooled)
+    session.mount("https://", pooled)
+    # One session serves every fetch thread and dealer; persisting cookies would leak them across both.
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+session = _build_session()
@@ -0,0 +1,15 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from worker.db import Base
+
+
+@pytest.fixture
+def db():
+    """A session on a fresh in-memory SQLite database with the worker's tables."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
@@ -0,0 +1,60 @@
+import random
+from worker.alerts import AlertIndex, meets_alert
+from worker.models import Alert, Listing
+
+STATES = ["CA", "NJ", "TX", None]
+
+
+def _alerts(rng: random.Random) -> list[Alert]:
+    return [
+        Alert(
+            id=alert_id,
+            user_email=f"user{alert_id}@example.com",
+            min_discount_percent=rng.choice([None, 0, 5.0, 10.0, 15.0]),
+            max_miles=rng.choice([None, 0, 1000, 5000]),
+            max_price=rng.choice([None, 90000.0, 110000.0]),
+            states=rng.choice([None, [], ["CA"], ["NJ", "TX"], ["CA", "TX"]]),
+        )
+        for alert_id in range(200)
+    ]
+
+
+def _listings(rng: random.Random) -> list[Listing]:
+    return [
+        Listing(
+            listing_id=f"listing{index}",
+            msrp=rng.choice([None, 0, 120000.0, 140000.0]),
+            advertised_price=rng.choice([None, 0, 95000.0, 105000.0, 125000.0]),
+            miles=rng.choice([None, 0, 500, 3000, 8000]),
+            dealer_state=rng.choice(STATES),
+        )
+        for index in range(300)
+    ]
+
+
+def test_index_matches_a_full_scan():
+    rng = random.Random(7)
+    alerts = _alerts(rng)
+    index = AlertIndex(alerts)
+    for listing in _listings(rng):
+        expected = {alert.id for alert in alerts if meets_alert(alert, listing)}
+        assert {alert.id for alert in index.matches(listing)} == expected
+
+
+def test_state_buckets_include_unrestricted_alerts():
+    anywhere = Alert(id=1, states=None)
+    california = Alert(id=2, states=["CA"])
+    texas = Alert(id=3, states=["TX"])
+    index = AlertIndex([anywhere, california, texas])
+
+    assert [alert.id for alert in index.matches(Listing(dealer_state="CA"))] == [1, 2]
+    assert [alert.id for alert in index.matches(Listing(dealer_state="WA"))] == [1]
+    assert sorted(alert.id for alert in index.matches(Listing(dealer_state=None))) == [1, 2, 3]
+
+
+def test_thresholds_narrow_candidates():
+    alerts = [Alert(id=alert_id, min_discount_percent=float(alert_id)) for alert_id in range(1, 21)]
+    listing = Listing(msrp=100000.0, advertised_price=95000.0)
+
+    assert len(AlertIndex(alerts)._all.candidates(listing)) == 5
+    assert [alert.id for alert in AlertIndex(alerts).matches(listing)] == [1, 2, 3, 4, 5]
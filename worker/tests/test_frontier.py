@@ -0,0 +1,84 @@
+import fakeredis
+import pytest
+from worker import main
+from worker.frontier import UrlFrontier, canonicalize_url
+
+
+class FakePlan:
+    """Admits every URL except those listed as known and not due; records what it was asked about."""
+
+    def __init__(self, not_due: set[str] = frozenset(), leftovers: list[tuple[str, str]] | None = None):
+        self.not_due = not_due
+        self.selected: list[str] = []
+        self._leftovers = leftovers or []
+
+    def select(self, source, url):
+        self.selected.append(url)
+        return url not in self.not_due
+
+    def leftovers(self):
+        return self._leftovers
+
+
+class FakeAdapter:
+    def __init__(self, source_name: str, urls: list[str]):
+        self.source_name = source_name
+        self.urls = urls
+
+    def discover(self):
+        return self.urls
+
+
+@pytest.fixture
+def frontier():
+    return UrlFrontier(1, fakeredis.FakeRedis())
+
+
+def test_canonical_urls_drop_tracking_and_normalize_case():
+    assert canonicalize_url("HTTPS://Dealer.COM:443/vdp?utm_source=x&b=2&a=1#top") == "https://dealer.com/vdp?a=1&b=2"
+    assert canonicalize_url("https://dealer.com/vdp?a=1&b=2&gclid=zz") == "https://dealer.com/vdp?a=1&b=2"
+    assert canonicalize_url("http://dealer.com:8080") == "http://dealer.com:8080/"
+
+
+def test_each_canonical_url_is_claimed_once(frontier):
+    assert frontier.claim("https://dealer.com/vdp?utm_medium=email")
+    assert not frontier.claim("https://Dealer.com/vdp#photos")
+    assert frontier.claim("https://dealer.com/other")
+    frontier.mark("https://dealer.com/vdp?utm_source=x", "fetched")
+    assert frontier._redis.hgetall(frontier.key) == {
+        b"https://dealer.com/vdp": b"fetched",
+        b"https://dealer.com/other": b"queued",
+    }
+
+
+def test_claims_fall_back_to_the_process_when_redis_is_down():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    frontier = UrlFrontier(1, fakeredis.FakeRedis(server=server))
+
+    assert frontier.claim("https://dealer.com/vdp")
+    assert not frontier.claim("https://dealer.com/vdp?utm_source=x")
+
+
+def test_discovered_urls_are_fetched_as_found(frontier):
+    raw = "https://Dealer.com/vdp/1?utm_source=search"
+    plan = FakePlan(not_due={"https://dealer.com/vdp/2"}, leftovers=[("dealer_site", "https://dealer.com/vdp/3")])
+    adapters = [
+        FakeAdapter("search", [raw, "https://dealer.com/vdp/2"]),
+        FakeAdapter("dealer_site", ["https://dealer.com/vdp/1", "https://dealer.com/vdp/3"]),
+    ]
+
+    shards = main._discover_shards(adapters, plan, frontier)
+
+    assert plan.selected == [raw, "https://dealer.com/vdp/2", "https://dealer.com/vdp/3"]
+    assert shards == {"dealer.com": [("search", raw), ("dealer_site", "https://dealer.com/vdp/3")]}
+    assert frontier._redis.hget(frontier.key, "https://dealer.com/vdp/2") == b"not_due"
+
+
+def test_due_leftovers_are_not_fetched_twice(frontier):
+    discovered = "https://dealer.com/vdp/1?utm_source=x"
+    due = [("dealer_site", "https://dealer.com/vdp/1"), ("dealer_site", "https://dealer.com/vdp/2")]
+    plan = FakePlan(leftovers=due)
+
+    shards = main._discover_shards([FakeAdapter("dealer_site", [discovered])], plan, frontier)
+    assert shards == {"dealer.com": [("dealer_site", discovered), ("dealer_site", "https://dealer.com/vdp/2")]}
@@ -0,0 +1,114 @@
+import asyncio
+import email
+import threading
+import time
+from http.client import HTTPMessage
+import pytest
+import requests
+from requests.cookies import MockRequest, MockResponse
+from worker import http, robots
+from worker.ratelimit import LocalRateLimiter
+
+
+class _Response:
+    status_code = 200
+
+
+@pytest.fixture
+def fake_fetch(monkeypatch):
+    """Replace the network with a 50 ms fetch that records when each URL was in flight."""
+    calls: list[tuple[str, float, float]] = []
+
+    def fake_get(url, **kwargs):
+        started = time.monotonic()
+        time.sleep(0.05)
+        calls.append((url, started, time.monotonic()))
+        return _Response()
+
+    monkeypatch.setattr(http.session, "get", fake_get)
+    monkeypatch.setattr(http, "limiter", LocalRateLimiter())
+    monkeypatch.setattr(http, "crawl_delay", lambda url: None)
+    return calls
+
+
+def _max_in_flight(calls: list[tuple[str, float, float]]) -> int:
+    events = sorted([(started, 1) for _, started, _ in calls] + [(finished, -1) for _, _, finished in calls])
+    in_flight = peak = 0
+    for _, delta in events:
+        in_flight += delta
+        peak = max(peak, in_flight)
+    return peak
+
+
+def test_fetches_across_domains_run_up_to_the_concurrency_limit(fake_fetch):
+    engine = http.FetchEngine(concurrency=3, rate_limit_s=0)
+
+    async def run():
+        await asyncio.gather(*(engine.get(f"https://dealer{index}.example/vdp") for index in range(6)))
+
+    asyncio.run(run())
+    assert len(fake_fetch) == 6
+    assert _max_in_flight(fake_fetch) == 3
+
+
+def test_fetches_to_one_domain_are_serialized_and_spaced(fake_fetch):
+    engine = http.FetchEngine(concurrency=4, rate_limit_s=0.1)
+
+    async def run():
+        await asyncio.gather(*(engine.get(f"https://dealer.example/vdp/{index}") for index in range(3)))
+
+    asyncio.run(run())
+    starts = sorted(started for _, started, _ in fake_fetch)
+    assert _max_in_flight(fake_fetch) == 1
+    assert all(later - earlier >= 0.09 for earlier, later in zip(starts, starts[1:]))
+
+
+def test_robots_lookups_run_off_the_event_loop(fake_fetch, monkeypatch):
+    lookups: list[bool] = []
+
+    def slow_crawl_delay(url):
+        lookups.append(threading.current_thread() is threading.main_thread())
+        time.sleep(0.05)
+        return None
+
+    monkeypatch.setattr(http, "crawl_delay", slow_crawl_delay)
+    engine = http.FetchEngine(concurrency=4, rate_limit_s=0)
+
+    async def run():
+        await asyncio.gather(*(engine.get(f"https://dealer{index}.example/vdp") for index in range(4)))
+
+    started = time.monotonic()
+    asyncio.run(run())
+    assert lookups == [False] * 4
+    assert time.monotonic() - started < 0.15
+
+
+def test_reservations_are_made_when_the_request_can_start(fake_fetch, monkeypatch):
+    reservations: list[tuple[str, float, float]] = []
+    local = LocalRateLimiter()
+
+    class RecordingLimiter:
+        def reserve(self, domain, spacing):
+            wait = local.reserve(domain, spacing)
+            reservations.append((domain, time.monotonic(), wait))
+            return wait
+
+    monkeypatch.setattr(http, "limiter", RecordingLimiter())
+    engine = http.FetchEngine(concurrency=1, rate_limit_s=0.02)
+
+    async def run():
+        await asyncio.gather(*(engine.get(f"https://dealer{index % 2}.example/vdp/{index}") for index in range(4)))
+
+    asyncio.run(run())
+    starts = sorted(started for _, started, _ in fake_fetch)
+    planned = sorted(reserved_at + wait for _, reserved_at, wait in reservations)
+    assert all(abs(start - plan) < 0.02 for start, plan in zip(starts, planned))
+
+
+def test_shared_session_keeps_no_cookies():
+    headers = email.message_from_string("Set-Cookie: dealer_session=abc; Path=/\n\n", _class=HTTPMessage)
+    request = requests.Request("GET", "https://dealer.example/vdp").prepare()
+    http.session.cookies.extract_cookies(MockResponse(headers), MockRequest(request))
+
+    assert len(http.session.cookies) == 0
+    assert robots.session is http.session
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import threading
+from pathlib import Path
+import pytest
+from worker import httpcache
+from worker.config import settings
+from worker.httpcache import CacheEntry, HttpCache, fetch_page
+
+URL = "https://dealer.example/vdp/1"
+HTML = "<html><body>BMW i7 loaner</body></html>"
+
+
+class _Response:
+    def __init__(self, status_code: int = 200, text: str = HTML, headers: dict | None = None):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode()
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+class FakeEngine:
+    def __init__(self, response: _Response):
+        self.response = response
+        self.requests: list[dict] = []
+
+    async def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers or {})
+        return self.response
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = HttpCache(str(tmp_path / "nested" / "http_cache.sqlite3"))
+    monkeypatch.setattr(httpcache, "http_cache", cache)
+    return cache
+
+
+def test_default_and_relative_paths_are_absolute(tmp_path, monkeypatch):
+    assert Path(settings.http_cache_path).is_absolute()
+    monkeypatch.chdir(tmp_path)
+    assert HttpCache("relative/cache.sqlite3").path == tmp_path / "relative" / "cache.sqlite3"
+
+
+def test_store_and_lookup_round_trip(cache):
+    assert cache.lookup(URL) is None
+    entry = CacheEntry(URL, '"v1"', "Fri, 01 Nov 2024 12:00:00 GMT", "abc", listing_id="listing1")
+    cache.store([entry])
+
+    assert cache.lookup(URL) == entry
+    assert cache.path.exists()
+
+
+def test_new_pages_carry_a_cache_entry(cache):
+    engine = FakeEngine(_Response(headers={"ETag": '"v1"'}))
+    raw = asyncio.run(fetch_page(URL, engine))
+
+    assert engine.requests == [{}]
+    assert raw["html"] == HTML
+    assert raw["cache_entry"].etag == '"v1"'
+    assert raw["cache_entry"].content_hash == hashlib.sha256(HTML.encode()).hexdigest()
+
+
+def test_not_modified_and_identical_pages_are_unchanged(cache):
+    content_hash = hashlib.sha256(HTML.encode()).hexdigest()
+    cache.store([CacheEntry(URL, '"v1"', None, content_hash, listing_id="listing1")])
+
+    engine = FakeEngine(_Response(304, text=""))
+    raw = asyncio.run(fetch_page(URL, engine))
+    assert engine.requests == [{"If-None-Match": '"v1"'}]
+    assert (raw["unchanged"], raw["listing_id"]) == (True, "listing1")
+
+    raw = asyncio.run(fetch_page(URL, FakeEngine(_Response(200))))
+    assert (raw["unchanged"], raw["listing_id"]) == (True, "listing1")
+
+
+def test_lookups_run_off_the_event_loop(cache, monkeypatch):
+    threads: list[bool] = []
+    lookup = cache.lookup
+
+    def recording_lookup(url):
+        threads.append(threading.current_thread() is threading.main_thread())
+        return lookup(url)
+
+    monkeypatch.setattr(cache, "lookup", recording_lookup)
+    asyncio.run(fetch_page(URL, FakeEngine(_Response())))
+    assert threads == [False]
@@ -0,0 +1,101 @@
+from datetime import datetime
+from sqlalchemy import select
+from worker.identity import IdentityIndex, vehicle_key
+from worker.models import Listing, ListingSource
+from worker.parsing import hash_listing_id
+from worker.writer import ListingWriter
+
+SEEN = datetime(2024, 11, 1, 12)
+VIN = "WBA21EH0XRCP12345"
+
+
+def _sighting(source: str, url: str, **fields) -> dict:
+    return {
+        "listing_id": hash_listing_id(url),
+        "source": source,
+        "dealer_vdp_url": url,
+        "model": "BMW i7",
+        "date_last_seen": SEEN,
+        "last_scraped_at": SEEN,
+        **fields,
+    }
+
+
+def test_vehicle_key_prefers_vin_then_dealer_stock_number():
+    assert vehicle_key({"vin": VIN.lower(), "stock_no": "A1"}) == f"vin:{VIN}"
+    assert vehicle_key({"dealer_name": "BMW of Atlanta", "stock_no": "ed50-22"}) == "stock:bmw of atlanta:ED50-22"
+    dealer_page = {"source": "dealer_site", "dealer_vdp_url": "https://Dealer.example/vdp/1", "stock_no": "A1"}
+    assert vehicle_key(dealer_page) == "stock:dealer.example:A1"
+    assert vehicle_key({"source": "aggregator", "dealer_vdp_url": "https://dealer.example/1", "stock_no": "A1"}) is None
+    assert vehicle_key({"source": "search", "dealer_vdp_url": "https://dealer.example/1"}) is None
+
+
+def test_lower_priority_sources_merge_into_the_dealer_listing():
+    index = IdentityIndex({}, {})
+    dealer = _sighting("dealer_site", "https://dealer.example/vdp/1", vin=VIN, miles=4000, confidence_score=0.9)
+    aggregator = _sighting(
+        "aggregator", "https://aggregator.example/1", vin=VIN, miles=None, aggregator_url="https://aggregator.example/1"
+    )
+
+    first = index.resolve("https://dealer.example/vdp/1", dealer)
+    second = index.resolve("https://aggregator.example/1", aggregator)
+
+    assert (first.first_this_sweep, second.first_this_sweep) == (True, False)
+    assert second.listing_id == first.listing_id == hash_listing_id("https://dealer.example/vdp/1")
+    assert {"source", "dealer_vdp_url", "confidence_score"} <= second.preserve
+    assert "miles" not in aggregator
+    assert second.sighting["source_listing_id"] == hash_listing_id("https://aggregator.example/1")
+    assert index.fresh_listing("https://aggregator.example/1") == first.listing_id
+
+
+def test_a_dealer_page_takes_over_an_aggregator_listing():
+    index = IdentityIndex({}, {})
+    urls = ["https://aggregator.example/1", "https://dealer.example/vdp/1", "https://aggregator.example/2"]
+    sources = ["aggregator", "dealer_site", "aggregator"]
+    aggregator, dealer, later = (
+        index.resolve(url, _sighting(source, url, vin=VIN)) for source, url in zip(sources, urls)
+    )
+
+    assert dealer.listing_id == aggregator.listing_id == later.listing_id
+    assert dealer.preserve == frozenset()
+    assert later.preserve
+
+
+def _write(db, sightings: list[tuple[str, dict]]) -> None:
+    index, writer = IdentityIndex.load(db), ListingWriter(db)
+    for url, normalized in sightings:
+        resolution = index.resolve(url, normalized)
+        writer.add(normalized, resolution.preserve, resolution.sighting)
+    writer.flush()
+
+
+def test_later_sweeps_resolve_to_the_stored_listing(db):
+    aggregator_url, dealer_url = "https://aggregator.example/1", "https://dealer.example/vdp/1"
+    _write(db, [(aggregator_url, _sighting("aggregator", aggregator_url, vin=VIN, advertised_price=99000))])
+    _write(db, [(dealer_url, _sighting("dealer_site", dealer_url, vin=VIN, advertised_price=101000, stock_no="A1"))])
+    _write(db, [(aggregator_url, _sighting("aggregator", aggregator_url, vin=VIN, advertised_price=98000))])
+
+    canonical = db.scalars(select(Listing)).one()
+    assert canonical.listing_id == hash_listing_id(aggregator_url)
+    assert (canonical.source, canonical.dealer_vdp_url, canonical.stock_no) == ("dealer_site", dealer_url, "A1")
+    assert canonical.advertised_price == 98000
+    sources = dict(db.execute(select(ListingSource.url, ListingSource.listing_id)).all())
+    assert sources == {aggregator_url: canonical.listing_id, dealer_url: canonical.listing_id}
+
+
+def test_superseded_listings_are_marked_merged(db):
+    aggregator_url, dealer_url = "https://aggregator.example/1", "https://dealer.example/vdp/1"
+    # Stored before identity tracking: no vehicle_key, so the dealer page starts its own listing.
+    writer = ListingWriter(db)
+    writer.add(_sighting("aggregator", aggregator_url, vin=VIN))
+    writer.flush()
+    _write(
+        db,
+        [
+            (dealer_url, _sighting("dealer_site", dealer_url, vin=VIN)),
+            (aggregator_url, _sighting("aggregator", aggregator_url, vin=VIN)),
+        ],
+    )
+
+    statuses = dict(db.execute(select(Listing.listing_id, Listing.listing_status)).all())
+    assert statuses == {hash_listing_id(dealer_url): "active", hash_listing_id(aggregator_url): "merged"}
@@ -0,0 +1,125 @@
+from datetime import datetime
+import fakeredis
+import pytest
+from rq import Queue
+from sqlalchemy.orm import Session
+from worker import main
+from worker.config import settings
+from worker.frontier import UrlFrontier
+from worker.metrics import merge_metrics
+from worker.models import ScrapeJob
+
+STARTED = datetime(2024, 11, 1, 12)
+
+
+@pytest.fixture
+def sweep(db, monkeypatch):
+    """A parent sweep job; finalize_scrape_job runs against the same database without touching Redis."""
+    monkeypatch.setattr(main, "SessionLocal", lambda: Session(db.get_bind()))
+    monkeypatch.setattr(main, "invalidate_listing_responses", lambda: None)
+    parent = ScrapeJob(source="all", status="running", started_at=STARTED)
+    db.add(parent)
+    db.commit()
+    return parent
+
+
+def _add_shards(db, parent: ScrapeJob, *statuses: str) -> None:
+    db.add_all(
+        ScrapeJob(source="shard", status=status, parent_id=parent.id, domain=f"dealer{index}.example", failures=1)
+        for index, status in enumerate(statuses)
+    )
+    db.commit()
+
+
+def _reload(db, job_id: int) -> ScrapeJob:
+    db.expire_all()
+    return db.get(ScrapeJob, job_id)
+
+
+def test_sweep_completes_when_every_shard_completed(db, sweep):
+    _add_shards(db, sweep, "completed", "completed")
+    main.finalize_scrape_job(sweep.id)
+
+    job = _reload(db, sweep.id)
+    assert (job.status, job.failures) == ("completed", 2)
+    assert job.finished_at is not None
+
+
+@pytest.mark.parametrize("unfinished", ["queued", "running"])
+def test_shards_that_never_finished_fail_the_sweep(db, sweep, unfinished):
+    _add_shards(db, sweep, "completed", unfinished)
+    main.finalize_scrape_job(sweep.id)
+
+    assert _reload(db, sweep.id).status == "failed"
+    shard = db.query(ScrapeJob).filter(ScrapeJob.parent_id == sweep.id, ScrapeJob.domain == "dealer1.example").one()
+    assert shard.status == "failed"
+    assert shard.finished_at is not None
+
+
+def test_shard_fails_cleanly_when_its_pipeline_cannot_start(db, sweep, monkeypatch):
+    _add_shards(db, sweep, "queued")
+    shard = db.query(ScrapeJob).filter(ScrapeJob.parent_id == sweep.id).one()
+
+    def broken_pipeline(*args, **kwargs):
+        raise RuntimeError("alerts table missing")
+
+    monkeypatch.setattr(main, "ScrapePipeline", broken_pipeline)
+    main.run_shard_job(shard.id, [("dealer_site", "https://dealer0.example/vdp/1")])
+
+    shard = _reload(db, shard.id)
+    assert (shard.status, shard.metrics) == ("failed", None)
+    assert shard.finished_at is not None
+
+
+def test_merged_metrics_sum_page_outcomes():
+    shards = [
+        {"pages": 5, "unchanged": 2, "blocked": 1, "stages": {}, "domains": {}},
+        {"pages": 3, "unchanged": 1, "stages": {}, "domains": {}},
+    ]
+    merged = merge_metrics(shards, 2.0)
+
+    assert (merged["pages"], merged["unchanged"], merged["blocked"]) == (8, 3, 1)
+    assert merged["pages_per_s"] == 4.0
+
+
+class _Adapter:
+    source_name = "dealer_site"
+
+    def __init__(self, urls: list[str] | None = None):
+        self.urls = urls
+
+    def discover(self):
+        if self.urls is None:
+            raise RuntimeError("search API down")
+        return self.urls
+
+
+@pytest.fixture
+def sweep_queue(db, monkeypatch):
+    """run_scrape_job against the test database, with its frontier and RQ queue on a fake Redis."""
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(main, "SessionLocal", lambda: Session(db.get_bind()))
+    monkeypatch.setattr(main, "UrlFrontier", lambda sweep_id: UrlFrontier(sweep_id, redis))
+    monkeypatch.setattr(main, "queue", Queue(connection=redis))
+    return main.queue
+
+
+def test_failed_discovery_fails_the_sweep(db, sweep_queue, monkeypatch):
+    monkeypatch.setattr(main, "_build_adapters", lambda: [_Adapter()])
+    main.run_scrape_job()
+
+    job = db.query(ScrapeJob).one()
+    assert job.status == "failed"
+    assert job.finished_at is not None
+    assert sweep_queue.count == 0
+
+
+def test_shard_jobs_get_time_for_their_rate_limited_urls(db, sweep_queue, monkeypatch):
+    monkeypatch.setattr(settings, "shard_job_timeout_s", 600)
+    monkeypatch.setattr(settings, "request_rate_limit_s", 2.0)
+    urls = [f"https://dealer0.example/vdp/{index}" for index in range(100)] + ["https://dealer1.example/vdp/1"]
+    monkeypatch.setattr(main, "_build_adapters", lambda: [_Adapter(urls)])
+    main.run_scrape_job()
+
+    timeouts = {job.args[1][0][1].split("/")[2]: job.timeout for job in sweep_queue.jobs}
+    assert timeouts == {"dealer0.example": 1000, "dealer1.example": 604}
@@ -0,0 +1,73 @@
+from pathlib import Path
+import pytest
+from bs4 import BeautifulSoup
+from worker import parsing
+from worker.parsing import extract_listing_fields, find_dealer_link, parse_html
+
+FIXTURES = sorted((Path(__file__).parents[2] / "backend" / "tests" / "fixtures").glob("*.html"))
+SNIPPETS = [
+    "",
+    "   \n",
+    "<!-- removed listing -->",
+    "<p>In stock<template><p>$1,000</p></template><noscript>Enable JavaScript</noscript> today</p>",
+    "<p>Stock #: ed50-22<script>var price = '$99,999';</script><style>p { color: red }</style> &amp; 1,200 miles</p>",
+    "<div>MSRP $120,000 <b>Now $110,500</b></div><a href='https://dealer.example'>Visit Dealer</a>",
+    "<table><tr><td>Executive Demo</td><td>WBA00000000000000</td></tr></table>",
+]
+PAGES = [path.read_text() for path in FIXTURES] + SNIPPETS
+
+
+def _words(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _soup_text(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup.find_all("noscript"):
+        element.decompose()
+    return soup.get_text(" ")
+
+
+@pytest.mark.parametrize("html", PAGES)
+def test_lxml_text_matches_beautifulsoup(html):
+    assert _words(parse_html(html).text) == _words(_soup_text(html))
+
+
+@pytest.mark.parametrize("html", ["", "  \n\t", "<!-- comment only -->"])
+def test_documents_without_elements_parse_to_empty_text(html):
+    page = parse_html(html)
+    assert page.text.strip() == ""
+    assert page.links() == []
+    assert extract_listing_fields(page)["is_loaner"] is False
+
+
+def test_template_and_noscript_text_is_dropped():
+    html = "<p>In stock<template><p>$1,000</p></template><noscript>Enable JavaScript</noscript> today</p>"
+    assert _words(parse_html(html).text) == "In stock today"
+
+
+@pytest.mark.parametrize("html", PAGES)
+def test_fallback_parser_extracts_the_same_fields(html, monkeypatch):
+    page = parse_html(html)
+    fields, dealer_link = extract_listing_fields(page), find_dealer_link(page)
+
+    monkeypatch.setattr(parsing, "lxml_html", None)
+    fallback = parse_html(html)
+    assert isinstance(fallback.tree, BeautifulSoup)
+    assert extract_listing_fields(fallback) == fields
+    assert find_dealer_link(fallback) == dealer_link
+
+
+def test_listing_fields_come_from_one_scan():
+    page = parse_html("<p>Executive demo, stock #A-123, 1,200 miles. MSRP $120,000 now $110,500</p>")
+
+    assert extract_listing_fields(page) == {
+        "is_loaner": True,
+        "listing_keywords": ["demo", "executive demo"],
+        "miles": 1200,
+        "vin": None,
+        "stock_no": "A-123",
+        "msrp": 120000.0,
+        "advertised_price": 110500.0,
+    }
+    assert parsing.scan_fields(page.text).prices == [120000.0, 110500.0]
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+import pytest
+from sqlalchemy import func, select
+from worker.adapters.base import SourceAdapter
+from worker.config import settings
+from worker.models import Listing
+from worker.parsing import hash_listing_id
+from worker import pipeline as pipeline_module
+from worker.pipeline import ScrapePipeline
+
+SCRAPED_AT = datetime(2024, 11, 1, 12)
+
+
+class SlowAdapter(SourceAdapter):
+    """Fetches take `delay` seconds; URLs containing "broken" fail, "same" are unchanged and "captcha" blocked.
+
+    Normalizing a "crash" URL kills the process, like a segfault in a parse worker.
+    """
+
+    source_name = "dealer_site"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.fetching = 0
+
+    def discover(self):
+        return []
+
+    def scrape_listing(self, url: str) -> dict:
+        raise NotImplementedError
+
+    async def scrape_listing_async(self, url, engine):
+        self.fetching += 1
+        await asyncio.sleep(self.delay)
+        if "broken" in url:
+            raise RuntimeError("connection reset")
+        if "same" in url:
+            return {"url": url, "unchanged": True, "listing_id": hash_listing_id(url), "scraped_at": SCRAPED_AT}
+        return {"url": url, "scraped_at": SCRAPED_AT, "bytes": 100}
+
+    def normalize(self, raw: dict) -> dict:
+        if "crash" in raw["url"]:
+            os._exit(1)
+        if "captcha" in raw["url"]:
+            return {"blocked": True, "url": raw["url"]}
+        return {
+            "listing_id": hash_listing_id(raw["url"]),
+            "source": self.source_name,
+            "dealer_vdp_url": raw["url"],
+            "model": "BMW i7",
+            "msrp": 120000,
+            "advertised_price": 110000,
+            "date_last_seen": raw["scraped_at"],
+            "last_scraped_at": raw["scraped_at"],
+        }
+
+
+@pytest.fixture
+def small_queues(monkeypatch):
+    monkeypatch.setattr(settings, "pipeline_queue_size", 2)
+    monkeypatch.setattr(settings, "pipeline_fetch_workers", 3)
+    monkeypatch.setattr(settings, "parse_workers", 0)
+    monkeypatch.setattr(settings, "archive_dir", "")
+
+
+def test_discovery_waits_for_slow_fetches(db, small_queues):
+    adapter = SlowAdapter(delay=0.01)
+    ahead: list[int] = []
+
+    async def targets():
+        for index in range(30):
+            ahead.append(index - adapter.fetching)
+            yield adapter, f"https://dealer.example/vdp/{index}"
+
+    blocked, failures = asyncio.run(ScrapePipeline(db).run(targets()))
+
+    assert (blocked, failures) == ([], 0)
+    # Discovery can only run one full fetch queue plus the in-flight workers ahead of the fetchers.
+    assert max(ahead) <= settings.pipeline_queue_size + settings.pipeline_fetch_workers
+    assert db.scalar(select(func.count()).select_from(Listing)) == 30
+
+
+def test_failed_fetches_do_not_stall_the_pipeline(db, small_queues):
+    adapter = SlowAdapter(delay=0)
+
+    async def targets():
+        for index in range(20):
+            yield adapter, f"https://dealer.example/{'broken' if index % 4 == 0 else 'vdp'}/{index}"
+
+    pipeline = ScrapePipeline(db)
+    blocked, failures = asyncio.run(asyncio.wait_for(pipeline.run(targets()), timeout=5))
+
+    assert failures == 5
+    assert pipeline.metrics.pages == 15
+    assert db.scalar(select(func.count()).select_from(Listing)) == 15
+
+
+def test_fetches_continue_while_a_write_blocks(db, small_queues):
+    adapter = SlowAdapter(delay=0.005)
+    progress: list[int] = []
+
+    async def targets():
+        for index in range(10):
+            yield adapter, f"https://dealer.example/vdp/{index}"
+
+    pipeline = ScrapePipeline(db)
+    add = pipeline.writer.add
+
+    def slow_add(*args):
+        before = adapter.fetching
+        time.sleep(0.05)
+        progress.append(adapter.fetching - before)
+        add(*args)
+
+    pipeline.writer.add = slow_add
+    asyncio.run(pipeline.run(targets()))
+
+    assert len(progress) == 10
+    assert max(progress) > 0
+
+
+def test_parse_pool_is_shared_by_every_run(monkeypatch):
+    monkeypatch.setattr(pipeline_module, "_parse_pool", None)
+    monkeypatch.setattr(settings, "parse_workers", 0)
+    assert pipeline_module.parse_pool() is None
+
+    monkeypatch.setattr(settings, "parse_workers", 1)
+    pool = pipeline_module.parse_pool()
+    try:
+        assert pool is not None
+        assert pipeline_module.parse_pool() is pool
+    finally:
+        pool.shutdown()
+
+
+def test_dead_parse_worker_is_replaced_for_later_parses(db, small_queues, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "_parse_pool", None)
+    monkeypatch.setattr(settings, "parse_workers", 1)
+    monkeypatch.setattr(settings, "pipeline_fetch_workers", 1)
+    adapter = SlowAdapter(delay=0)
+
+    async def targets():
+        for index, path in enumerate(["vdp", "crash", "vdp"]):
+            yield adapter, f"https://dealer.example/{path}/{index}"
+
+    first_pool = pipeline_module.parse_pool()
+    try:
+        pipeline = ScrapePipeline(db)
+        blocked, failures = asyncio.run(asyncio.wait_for(pipeline.run(targets()), timeout=60))
+
+        assert (blocked, failures) == ([], 1)
+        assert db.scalar(select(func.count()).select_from(Listing)) == 2
+        assert pipeline_module.parse_pool() is not first_pool
+    finally:
+        for pool in {first_pool, pipeline_module._parse_pool} - {None}:
+            pool.shutdown()
+
+
+def test_unchanged_and_blocked_pages_are_counted_separately(db, small_queues):
+    adapter = SlowAdapter(delay=0)
+    paths = ["vdp", "same", "captcha", "same", "broken"]
+
+    async def targets():
+        for index, path in enumerate(paths):
+            yield adapter, f"https://dealer.example/{path}/{index}"
+
+    pipeline = ScrapePipeline(db)
+    blocked, failures = asyncio.run(pipeline.run(targets()))
+    metrics = pipeline.metrics.to_dict()
+
+    assert (len(blocked), failures) == (1, 1)
+    assert (metrics["pages"], metrics["unchanged"], metrics["blocked"]) == (4, 2, 1)
+    assert metrics["domains"]["dealer.example"]["failures"] == 1
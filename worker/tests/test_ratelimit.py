@@ -0,0 +1,34 @@
+import fakeredis
+import pytest
+from worker.ratelimit import LocalRateLimiter, RedisRateLimiter
+
+
+def test_local_limiter_spaces_each_domain_independently():
+    limiter = LocalRateLimiter()
+
+    assert limiter.reserve("a.example", 1.0) == 0
+    assert limiter.reserve("a.example", 1.0) == pytest.approx(1.0, abs=0.01)
+    assert limiter.reserve("a.example", 1.0) == pytest.approx(2.0, abs=0.01)
+    assert limiter.reserve("b.example", 1.0) == 0
+
+
+def test_redis_limiter_is_shared_between_processes():
+    server = fakeredis.FakeServer()
+    first = RedisRateLimiter(fakeredis.FakeRedis(server=server))
+    second = RedisRateLimiter(fakeredis.FakeRedis(server=server))
+
+    assert first.reserve("a.example", 1.0) == pytest.approx(0, abs=0.01)
+    assert second.reserve("a.example", 1.0) == pytest.approx(1.0, abs=0.01)
+    assert second.reserve("b.example", 1.0) == pytest.approx(0, abs=0.01)
+
+
+def test_redis_outage_falls_back_to_local_spacing():
+    server = fakeredis.FakeServer()
+    limiter = RedisRateLimiter(fakeredis.FakeRedis(server=server))
+    server.connected = False
+
+    assert limiter.reserve("a.example", 1.0) == 0
+    assert limiter.reserve("a.example", 1.0) == pytest.approx(1.0, abs=0.01)
+
+    server.connected = True
+    assert limiter.reserve("a.example", 1.0) == pytest.approx(0, abs=0.01)
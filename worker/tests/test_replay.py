@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from worker import replay as replay_module
+from worker.archive import PageArchive
+from worker.models import Listing
+from worker.parsing import hash_listing_id
+from worker.writer import ListingWriter
+
+FIXTURES = Path(__file__).parents[2] / "backend" / "tests" / "fixtures"
+URL = "https://dealer.example/vdp/1"
+SCRAPED_AT = datetime(2024, 11, 1, 12)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return PageArchive(str(tmp_path / "archive"))
+
+
+def test_archive_round_trip_and_versions(archive):
+    first, second = (FIXTURES / "dealer1.html").read_text(), (FIXTURES / "dealer2.html").read_text()
+    first_hash = archive.store(URL, "dealer_site", first, SCRAPED_AT)
+    assert archive.store(URL, "dealer_site", first, SCRAPED_AT + timedelta(hours=1)) == first_hash
+    second_hash = archive.store(URL, "dealer_site", second, SCRAPED_AT + timedelta(hours=2))
+    archive.store("https://aggregator.example/1", "aggregator", first, SCRAPED_AT)
+
+    assert archive.load(first_hash) == first
+    assert len(list((archive.root / "blobs").rglob("*.zst"))) == 2
+
+    latest = {page.url: page for page in archive.pages()}
+    assert latest[URL].content_hash == second_hash
+    assert latest[URL].scraped_at == SCRAPED_AT + timedelta(hours=2)
+    versions = [page.content_hash for page in archive.pages(source="dealer_site", latest_only=False)]
+    assert versions == [first_hash, first_hash, second_hash]
+    assert [page.url for page in archive.pages(since=SCRAPED_AT + timedelta(hours=1))] == [URL]
+
+
+def test_concurrent_stores_of_one_page_share_a_blob(archive):
+    html = (FIXTURES / "dealer1.html").read_text()
+    with ThreadPoolExecutor(8) as pool:
+        hashes = set(pool.map(lambda _: archive.store(URL, "dealer_site", html, SCRAPED_AT), range(32)))
+
+    assert len(hashes) == 1
+    assert archive.load(hashes.pop()) == html
+    assert [path.suffix for path in (archive.root / "blobs").rglob("*.*")] == [".zst"]
+
+
+@pytest.fixture
+def replay_env(db, archive, monkeypatch):
+    monkeypatch.setattr(replay_module, "SessionLocal", lambda: Session(db.get_bind()))
+    monkeypatch.setattr(replay_module, "page_archive", archive)
+    invalidations: list[bool] = []
+    monkeypatch.setattr(replay_module, "invalidate_listing_responses", lambda: invalidations.append(True))
+    return invalidations
+
+
+def _stored(db) -> Listing:
+    db.expire_all()
+    return db.scalars(select(Listing).where(Listing.listing_id == hash_listing_id(URL))).one()
+
+
+def test_replay_rederives_fields_without_counting_a_visit(db, archive, replay_env):
+    writer = ListingWriter(db)
+    writer.add(
+        {
+            "listing_id": hash_listing_id(URL),
+            "source": "dealer_site",
+            "dealer_vdp_url": URL,
+            "model": "BMW i7",
+            "msrp": 1.0,
+            "advertised_price": 1.0,
+            "date_last_seen": SCRAPED_AT,
+            "last_scraped_at": SCRAPED_AT,
+        }
+    )
+    writer.flush()
+    before = _stored(db)
+    counts, scheduled = (before.visit_count, before.change_count), before.next_visit_at
+
+    archive.store(URL, "dealer_site", (FIXTURES / "dealer2.html").read_text(), SCRAPED_AT)
+    assert replay_module.replay() == (1, 0)
+
+    after = _stored(db)
+    assert after.stock_no == "ED50-22"
+    assert after.msrp > 1.0
+    assert (after.visit_count, after.change_count) == counts
+    assert after.next_visit_at == scheduled
+    assert replay_env == [True]
+
+
+def test_dry_run_writes_nothing(db, archive, replay_env):
+    archive.store(URL, "dealer_site", (FIXTURES / "dealer1.html").read_text(), SCRAPED_AT)
+
+    assert replay_module.replay(dry_run=True) == (1, 0)
+    assert db.scalar(select(Listing)) is None
+    assert replay_env == []
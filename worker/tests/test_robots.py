@@ -0,0 +1,89 @@
+import fakeredis
+import pytest
+import requests
+from worker import robots
+from worker.config import settings
+
+ROBOTS_TXT = "User-agent: *\nDisallow: /private\nCrawl-delay: 3\n"
+
+
+class _Response:
+    def __init__(self, status_code: int, text: str = ""):
+        self.status_code = status_code
+        self.text = text
+        self.ok = status_code < 400
+
+
+@pytest.fixture
+def robots_env(monkeypatch):
+    """Fresh in-memory and fake-Redis caches, with robots.txt served from `responses` and fetches counted."""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(robots, "redis_conn", fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(robots, "_cache", {})
+    clock = {"now": 1_000_000.0}
+    monkeypatch.setattr(robots.time, "time", lambda: clock["now"])
+    env = {"responses": {}, "fetches": [], "clock": clock, "server": server}
+
+    def fake_get(url, **kwargs):
+        env["fetches"].append(url)
+        response = env["responses"][url]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(robots.session, "get", fake_get)
+    return env
+
+
+def test_rules_are_cached_for_the_ttl(robots_env):
+    robots_env["responses"]["https://dealer.example/robots.txt"] = _Response(200, ROBOTS_TXT)
+
+    assert robots.allowed("https://dealer.example/vdp/1")
+    assert not robots.allowed("https://dealer.example/private/1")
+    assert robots.crawl_delay("https://dealer.example/vdp/1") == 3.0
+    assert len(robots_env["fetches"]) == 1
+    assert robots.redis_conn.ttl("robots:https://dealer.example") == settings.robots_cache_ttl_s
+
+    # Another process (empty in-memory cache) reuses the Redis copy instead of refetching.
+    robots._cache.clear()
+    assert robots.allowed("https://dealer.example/vdp/2")
+    assert len(robots_env["fetches"]) == 1
+
+    robots_env["clock"]["now"] += settings.robots_cache_ttl_s + 1
+    robots.redis_conn.delete("robots:https://dealer.example")
+    assert robots.allowed("https://dealer.example/vdp/3")
+    assert len(robots_env["fetches"]) == 2
+
+
+@pytest.mark.parametrize(
+    "response", [_Response(503), requests.ConnectionError("refused")], ids=["server-error", "unreachable"]
+)
+def test_failures_disallow_briefly(robots_env, response):
+    robots_env["responses"]["https://dealer.example/robots.txt"] = response
+
+    assert not robots.allowed("https://dealer.example/vdp/1")
+    assert robots.redis_conn.ttl("robots:https://dealer.example") == settings.robots_negative_ttl_s
+    assert robots._cache["https://dealer.example"][1] == robots_env["clock"]["now"] + settings.robots_negative_ttl_s
+
+    robots_env["responses"]["https://dealer.example/robots.txt"] = _Response(200, ROBOTS_TXT)
+    robots_env["clock"]["now"] += settings.robots_negative_ttl_s + 1
+    robots.redis_conn.delete("robots:https://dealer.example")
+    assert robots.allowed("https://dealer.example/vdp/1")
+    assert len(robots_env["fetches"]) == 2
+
+
+def test_missing_robots_allows_everything(robots_env):
+    robots_env["responses"]["https://dealer.example/robots.txt"] = _Response(404)
+
+    assert robots.allowed("https://dealer.example/private/1")
+    assert robots.crawl_delay("https://dealer.example/vdp/1") is None
+    assert robots.redis_conn.ttl("robots:https://dealer.example") == settings.robots_cache_ttl_s
+
+
+def test_redis_outage_falls_back_to_fetching(robots_env):
+    robots_env["server"].connected = False
+    robots_env["responses"]["https://dealer.example/robots.txt"] = _Response(200, ROBOTS_TXT)
+
+    assert not robots.allowed("https://dealer.example/private/1")
+    assert robots.allowed("https://dealer.example/vdp/1")
+    assert len(robots_env["fetches"]) == 1
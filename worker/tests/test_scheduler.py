@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from worker.config import settings
+from worker.models import Listing, ListingSource
+from worker.parsing import hash_listing_id
+from worker.scheduler import RecrawlPlan, next_visit_at, reschedule
+
+NOW = datetime(2024, 11, 1, 12)
+
+
+def _interval(**overrides) -> float:
+    args = {"visit_count": 4, "change_count": 1, "msrp": 120000, "advertised_price": 120000, "first_seen": NOW}
+    return (next_visit_at(NOW, **{**args, **overrides}) - NOW).total_seconds()
+
+
+def _listing(index: int, next_visit: datetime | None, source: str = "dealer_site") -> Listing:
+    url = f"https://dealer.example/vdp/{index}"
+    return Listing(
+        listing_id=hash_listing_id(url),
+        source=source,
+        dealer_vdp_url=url,
+        model="BMW i7",
+        date_first_seen=NOW,
+        aggregator_url=f"https://aggregator.example/{index}" if source == "aggregator" else None,
+        next_visit_at=next_visit,
+    )
+
+
+def test_listings_that_change_or_discount_more_are_visited_sooner():
+    assert _interval(change_count=3) < _interval(change_count=1) < _interval(change_count=0)
+    assert _interval(advertised_price=108000) < _interval(advertised_price=114000) < _interval()
+    assert _interval(first_seen=NOW - timedelta(days=30)) > _interval()
+    assert _interval(msrp=None, advertised_price=None, first_seen=None) == _interval()
+
+
+def test_intervals_are_clamped():
+    assert _interval(visit_count=0, change_count=50, advertised_price=60000) == settings.recrawl_min_interval_s
+    assert _interval(visit_count=500, change_count=0, first_seen=NOW - timedelta(days=3650)) == (
+        settings.recrawl_max_interval_s
+    )
+
+
+def test_reschedule_sets_next_visit_and_ignores_missing_rows(db):
+    db.add(_listing(1, None))
+    db.commit()
+
+    reschedule(db, [])
+    reschedule(db, ["no-such-listing"])
+    reschedule(db, [hash_listing_id("https://dealer.example/vdp/1")], now=NOW)
+
+    scheduled = db.scalar(select(Listing.next_visit_at))
+    assert scheduled == next_visit_at(NOW, 0, 0, None, None, NOW)
+
+
+def test_plan_visits_never_scheduled_then_most_overdue_first(db):
+    db.add_all(
+        [
+            _listing(1, NOW - timedelta(hours=1)),
+            _listing(2, None),
+            _listing(3, NOW - timedelta(days=2)),
+            _listing(4, NOW + timedelta(hours=1)),
+            _listing(5, NOW - timedelta(days=1), source="aggregator"),
+        ]
+    )
+    db.commit()
+
+    plan = RecrawlPlan.load(db, now=NOW, budget=3)
+    assert plan.leftovers() == [
+        ("dealer_site", "https://dealer.example/vdp/2"),
+        ("dealer_site", "https://dealer.example/vdp/3"),
+        ("aggregator", "https://aggregator.example/5"),
+    ]
+
+
+def test_plan_skips_known_urls_that_are_not_due(db):
+    db.add_all([_listing(1, NOW - timedelta(hours=1)), _listing(2, NOW + timedelta(hours=1))])
+    db.add(
+        ListingSource(
+            url_hash=hash_listing_id("https://mirror.example/vdp/2"),
+            url="https://mirror.example/vdp/2",
+            source="dealer_site",
+            listing_id=hash_listing_id("https://dealer.example/vdp/2"),
+            source_listing_id=hash_listing_id("https://mirror.example/vdp/2"),
+        )
+    )
+    db.commit()
+    plan = RecrawlPlan.load(db, now=NOW)
+
+    assert plan.select("dealer_site", "https://dealer.example/vdp/1")
+    assert not plan.select("dealer_site", "https://dealer.example/vdp/1")
+    assert not plan.select("dealer_site", "https://dealer.example/vdp/2")
+    assert not plan.select("dealer_site", "https://mirror.example/vdp/2")
+    assert plan.select("dealer_site", "https://dealer.example/vdp/new")
+    assert plan.select("search", "https://dealer.example/vdp/2")
+    assert plan.leftovers() == []
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import select
+from worker.cohorts import refresh_cohorts
+from worker.db import insert_for
+from worker.models import CohortStats, Listing
+from worker.writer import ListingWriter
+
+SEEN = datetime(2024, 11, 1, 12)
+
+
+def _listing(listing_id: str = "listing1", seen: datetime = SEEN, **fields) -> dict:
+    return {
+        "listing_id": listing_id,
+        "source": "dealer_site",
+        "dealer_vdp_url": f"https://dealer.example/{listing_id}",
+        "model": "BMW i7",
+        "trim": "xDrive60",
+        "msrp": 120000,
+        "advertised_price": 110000,
+        "miles": 4000,
+        "listing_keywords": ["loaner"],
+        "date_last_seen": seen,
+        "last_scraped_at": seen,
+        **fields,
+    }
+
+
+def _stored(db, listing_id: str = "listing1") -> Listing:
+    db.expire_all()
+    return db.scalars(select(Listing).where(Listing.listing_id == listing_id)).one()
+
+
+def test_upsert_keeps_first_seen_and_only_counts_real_changes(db):
+    writer = ListingWriter(db)
+    writer.add(_listing())
+    assert writer.flush() == 1
+    first = _stored(db)
+    assert (first.visit_count, first.change_count, first.date_first_seen) == (1, 0, SEEN)
+    assert first.score is not None
+
+    writer.add(_listing(seen=SEEN + timedelta(hours=1)))
+    writer.flush()
+    revisited = _stored(db)
+    assert (revisited.visit_count, revisited.change_count) == (2, 0)
+    assert revisited.date_first_seen == SEEN
+    assert revisited.date_last_seen == SEEN + timedelta(hours=1)
+
+    writer.add(_listing(seen=SEEN + timedelta(hours=2), advertised_price=105000, listing_keywords=["demo"]))
+    writer.flush()
+    changed = _stored(db)
+    assert (changed.visit_count, changed.change_count) == (3, 1)
+    assert (changed.advertised_price, changed.listing_keywords) == (105000, ["demo"])
+    assert changed.date_first_seen == SEEN
+
+
+def test_preserved_columns_only_fill_gaps(db):
+    writer = ListingWriter(db)
+    writer.add(_listing(confidence_score=0.9))
+    writer.flush()
+    writer.add(
+        _listing(source="aggregator", confidence_score=0.2, dealer_vdp_url="https://aggregator.example/1"),
+        preserve=frozenset({"source", "dealer_vdp_url", "confidence_score"}),
+    )
+    writer.flush()
+    stored = _stored(db)
+    assert (stored.source, stored.confidence_score) == ("dealer_site", 0.9)
+    assert stored.change_count == 0
+
+
+def test_dates_never_move_backwards(db):
+    writer = ListingWriter(db)
+    writer.add(_listing(seen=SEEN))
+    writer.flush()
+    writer.add(_listing(seen=SEEN - timedelta(days=1), advertised_price=100000))
+    writer.flush()
+    stored = _stored(db)
+    assert stored.date_last_seen == SEEN
+    assert stored.advertised_price == 100000
+
+
+def test_unsupported_dialects_are_rejected():
+    with pytest.raises(ValueError):
+        insert_for("mysql")
+
+
+def _cohorts(db) -> dict[tuple[str, int], CohortStats]:
+    db.expire_all()
+    return {(row.trim, row.msrp_bucket): row for row in db.scalars(select(CohortStats))}
+
+
+def test_writes_upsert_cohorts_in_place_and_drop_emptied_ones(db):
+    writer = ListingWriter(db)
+    writer.add(_listing("listing1", advertised_price=110000))
+    writer.add(_listing("listing2", advertised_price=114000))
+    writer.flush()
+    cohort = _cohorts(db)[("xDrive60", 12)]
+    assert (cohort.listing_count, cohort.discounts) == (2, [5.0, 8.33])
+    cohort_id = cohort.id
+
+    writer.add(_listing("listing2", advertised_price=108000))
+    writer.flush()
+    cohort = _cohorts(db)[("xDrive60", 12)]
+    assert (cohort.id, cohort.discounts) == (cohort_id, [8.33, 10.0])
+
+    writer.add(_listing("listing1", trim="M70"))
+    writer.add(_listing("listing2", trim="M70"))
+    writer.flush()
+    assert set(_cohorts(db)) == {("M70", 12)}
+
+
+def test_refresh_without_listings_leaves_no_cohort(db):
+    refresh_cohorts(db, {("xDrive60", 12)})
+    assert _cohorts(db) == {}
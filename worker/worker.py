@@ -1,9 +1,12 @@
-from rq import Worker, Queue
+from rq import SimpleWorker, Worker, Queue
 from redis import Redis
 from .config import settings
 
 redis_conn = Redis.from_url(settings.redis_url)
 
 if __name__ == "__main__":
-    worker = Worker([Queue(connection=redis_conn)], connection=redis_conn)
+    # Worker forks a work horse per job, which would start a fresh parse pool for every shard;
+    # SimpleWorker runs jobs in this process so the pool is started once and reused.
+    worker_class = SimpleWorker if settings.parse_workers > 0 else Worker
+    worker = worker_class([Queue(connection=redis_conn)], connection=redis_conn)
     worker.work()
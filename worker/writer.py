@@ -0,0 +1,182 @@
+from collections.abc import Callable
+from datetime import datetime
+from loguru import logger
+from sqlalchemy import JSON, Text, bindparam, case, cast, false, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from .cohorts import cohorts_of, refresh_cohorts
+from .config import settings
+from .db import insert_for
+from .models import Listing, ListingSource
+from .scheduler import reschedule
+from .scoring import rescore
+
+_IMMUTABLE_COLUMNS = {"id", "listing_id", "date_first_seen", "visit_count", "change_count"}
+_MONOTONIC_COLUMNS = {"date_last_seen", "last_scraped_at"}
+
+
+def _distinct(column, value):
+    # json has no equality operator on Postgres; both sides are serialized the same way.
+    if isinstance(column.type, JSON):
+        return cast(column, Text).is_distinct_from(cast(value, Text))
+    return column.is_distinct_from(value)
+
+
+class ListingWriter:
+    """Buffers normalized listings and upserts them in batches keyed on listing_id.
+
+    With replay=True the rows are re-derived from archived pages rather than new visits, so visit and
+    change counts, last-seen touches and the recrawl schedule are left as they are.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int | None = None,
+        on_flush: Callable[[list[dict]], None] | None = None,
+        replay: bool = False,
+    ):
+        self.db = db
+        self.replay = replay
+        self.batch_size = batch_size or settings.upsert_batch_size
+        self.on_flush = on_flush
+        self._insert = insert_for(db.get_bind().dialect.name)
+        self._pending: dict[str, dict] = {}
+        self._preserve: dict[str, frozenset[str]] = {}
+        self._sightings: dict[str, dict] = {}
+        self._touched: dict[str, datetime] = {}
+
+    def add(self, normalized: dict, preserve: frozenset[str] = frozenset(), sighting: dict | None = None) -> None:
+        """Queue an upsert; columns in preserve only fill gaps and never overwrite the stored row."""
+        listing_id = normalized["listing_id"]
+        if listing_id in self._pending:
+            row = self._pending[listing_id]
+            for column, value in normalized.items():
+                if column not in preserve or column not in row:
+                    row[column] = value
+            self._preserve[listing_id] &= preserve
+        else:
+            self._pending[listing_id] = dict(normalized)
+            self._preserve[listing_id] = preserve
+        if sighting:
+            self._sightings[sighting["url_hash"]] = sighting
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def touch(self, listing_id: str, seen_at: datetime) -> None:
+        self._touched[listing_id] = seen_at
+        if len(self._touched) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        if not self._pending and not self._touched:
+            return 0
+        flushed = len(self._pending) + len(self._touched)
+        pending, self._pending = self._pending, {}
+        preserve, self._preserve = self._preserve, {}
+        sightings, self._sightings = self._sightings, {}
+        touched, self._touched = self._touched, {}
+        batches: dict[tuple[frozenset[str], frozenset[str]], list[dict]] = {}
+        for listing_id, row in pending.items():
+            row.setdefault("date_first_seen", row.get("date_last_seen"))
+            row.setdefault("visit_count", 1)
+            row.setdefault("change_count", 0)
+            batches.setdefault((frozenset(row), preserve[listing_id]), []).append(row)
+
+        table = Listing.__table__
+        try:
+            # Cohorts the rows leave (a new trim or MSRP, or a merged duplicate) need refreshing too.
+            merged = [
+                sighting["source_listing_id"]
+                for sighting in sightings.values()
+                if sighting["source_listing_id"] != sighting["listing_id"]
+            ]
+            cohorts = cohorts_of(self.db, [*pending, *merged])
+            changed: set[str] = set()
+            counters = {"visit_count": table.c.visit_count + 1, "change_count": table.c.change_count + 1}
+            if self.replay:
+                counters = {}
+            for (columns, kept), rows in batches.items():
+                tracked = columns - _IMMUTABLE_COLUMNS - _MONOTONIC_COLUMNS - kept
+                stmt = self._insert(Listing).values(rows)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Listing.listing_id],
+                    set_={
+                        **{column: stmt.excluded[column] for column in tracked},
+                        **{
+                            column: case(
+                                (stmt.excluded[column] > table.c[column], stmt.excluded[column]),
+                                else_=table.c[column],
+                            )
+                            for column in columns & _MONOTONIC_COLUMNS
+                        },
+                        **counters,
+                    },
+                    # Rows whose tracked columns all match are not rewritten; they are only touched below.
+                    where=or_(false(), *(_distinct(table.c[column], stmt.excluded[column]) for column in tracked)),
+                ).returning(table.c.listing_id)
+                changed.update(self.db.scalars(stmt))
+            for listing_id, row in pending.items():
+                if listing_id not in changed and row.get("date_last_seen") and not self.replay:
+                    touched[listing_id] = max(touched.get(listing_id, row["date_last_seen"]), row["date_last_seen"])
+            if touched:
+                self.db.execute(
+                    table.update()
+                    .where(table.c.listing_id == bindparam("touched_id"))
+                    .values(
+                        date_last_seen=bindparam("seen_at"),
+                        last_scraped_at=bindparam("seen_at"),
+                        visit_count=table.c.visit_count + 1,
+                    ),
+                    [{"touched_id": listing_id, "seen_at": seen_at} for listing_id, seen_at in touched.items()],
+                )
+            if sightings:
+                self._record_sightings(list(sightings.values()))
+            rescore(self.db, list(changed))
+            cohorts |= cohorts_of(self.db, list(changed))
+            if not self.replay:
+                reschedule(self.db, list({*pending, *touched}))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        # In a transaction of its own so listing row locks aren't held while cohorts are rebuilt; a cohort
+        # that fails here is caught up by its next write or by backend/app/cohorts.py.
+        try:
+            refresh_cohorts(self.db, cohorts)
+            self.db.commit()
+        except SQLAlchemyError as exc:
+            self.db.rollback()
+            logger.warning("Failed to refresh {} cohorts: {}", len(cohorts), exc)
+        if self.on_flush:
+            self.on_flush(list(pending.values()))
+        return flushed
+
+    def _record_sightings(self, sightings: list[dict]) -> None:
+        table = ListingSource.__table__
+        stmt = self._insert(ListingSource).values(sightings)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ListingSource.url_hash],
+            set_={
+                "listing_id": stmt.excluded.listing_id,
+                "source_listing_id": stmt.excluded.source_listing_id,
+                "vehicle_key": stmt.excluded.vehicle_key,
+                "last_seen": case(
+                    (stmt.excluded.last_seen > table.c.last_seen, stmt.excluded.last_seen),
+                    else_=table.c.last_seen,
+                ),
+            },
+        )
+        self.db.execute(stmt)
+        merged = {
+            sighting["source_listing_id"]: sighting["listing_id"]
+            for sighting in sightings
+            if sighting["source_listing_id"] != sighting["listing_id"]
+        }
+        if merged:
+            listings = Listing.__table__
+            self.db.execute(
+                listings.update()
+                .where(listings.c.listing_id.in_(merged), listings.c.listing_id.not_in(set(merged.values())))
+                .values(listing_status="merged")
+            )